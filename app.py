@@ -5,7 +5,11 @@ A RAG application for Chemical Engineering with book-based retrieval and general
 
 import streamlit as st
 from pathlib import Path
+import re
 import sys
+import threading
+import time
+import traceback
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -13,14 +17,16 @@ sys.path.insert(0, str(Path(__file__).parent))
 from src.document_processor import DocumentProcessor
 from src.book_manager import BookManager
 from src.rag_engine import RAGEngine
-from src.export_handler import ExportHandler
 from config.settings import settings
-from utils.helpers import get_timestamp, truncate_text
+from utils.helpers import get_timestamp, truncate_text, format_citations_list, Source, GENERAL_KNOWLEDGE_CITATION
 from utils.logger import get_logger
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Minimum seconds between redraws of the streaming answer
+STREAM_RENDER_INTERVAL = 0.05
+
 # Page configuration
 st.set_page_config(
     page_title="Chemical Engineering RAG",
@@ -29,41 +35,101 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1f77b4;
-        text-align: center;
-        margin-bottom: 1rem;
-    }
-    .sub-header {
-        text-align: center;
-        color: #666;
-        margin-bottom: 2rem;
-    }
-    .source-badge {
-        display: inline-block;
-        padding: 0.25rem 0.75rem;
-        border-radius: 0.25rem;
-        font-size: 0.875rem;
-        font-weight: 600;
-        margin-bottom: 1rem;
-    }
-    .book-mode {
-        background-color: #d4edda;
-        color: #155724;
-    }
-    .general-mode {
-        background-color: #d1ecf1;
-        color: #0c5460;
-    }
-    .stButton>button {
-        width: 100%;
-    }
-</style>
-""", unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
+def load_css() -> str:
+    """Read the custom stylesheet once and collapse its whitespace"""
+    css = (Path(__file__).parent / "static" / "style.css").read_text(encoding="utf-8")
+    css = re.sub(r'\s+', ' ', css).strip()
+    return f"<style>{css}</style>"
+
+
+# Custom CSS (Streamlit drops elements that are not re-emitted, so this runs every rerun)
+st.markdown(load_css(), unsafe_allow_html=True)
+
+
+@st.cache_resource(show_spinner=False)
+def get_rag_engine():
+    """Create the RAG engine once per server process and share it across sessions"""
+    logger.info("Creating shared RAG engine")
+    engine = RAGEngine()
+    
+    # Warm the embedding model off the critical path of the first query
+    threading.Thread(target=engine.vector_store.warmup, daemon=True).start()
+    return engine
+
+
+@st.cache_resource(show_spinner=False)
+def _load_book_manager():
+    """Create the shared BookManager instance"""
+    return BookManager()
+
+
+def get_book_manager():
+    """Get the shared BookManager, reloading the tracker if it changed on disk"""
+    book_manager = _load_book_manager()
+    book_manager.reload_if_changed()
+    return book_manager
+
+
+@st.cache_resource(show_spinner=False)
+def get_document_processor():
+    """Get the shared DocumentProcessor instance"""
+    return DocumentProcessor()
+
+
+@st.cache_resource(show_spinner=False)
+def get_exporter():
+    """Get the shared ExportHandler (reportlab/python-docx are imported on first export)"""
+    from src.export_handler import ExportHandler
+    return ExportHandler()
+
+
+def _path_mtime(path: Path) -> float:
+    """Get a path's modification time, or 0 if it does not exist"""
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_books_count(books_dir_mtime: float) -> int:
+    """Count PDFs in the books directory (cached; keyed on the directory mtime)"""
+    return settings.get_books_count()
+
+
+@st.cache_data(ttl=15, show_spinner=False)
+def get_book_stats(tracker_revision: int) -> dict:
+    """Get processed-book statistics (cached; keyed on the tracker revision)"""
+    return get_book_manager().get_stats()
+
+
+def clear_book_caches():
+    """Invalidate cached book counts and stats after the tracker changes"""
+    get_books_count.clear()
+    get_book_stats.clear()
+
+
+@st.cache_data(show_spinner=False)
+def format_citations(sources_key: tuple) -> str:
+    """Format (book, page) pairs as a markdown citation list (cached)"""
+    return format_citations_list(Source(book, page) for book, page in sources_key)
+
+
+def get_citations(item: dict) -> str:
+    """
+    Get the citation markdown for a response
+    
+    Args:
+        item: Response dictionary with 'mode' and structured 'sources'
+        
+    Returns:
+        Formatted citations
+    """
+    if item['mode'] == 'general_knowledge':
+        return GENERAL_KNOWLEDGE_CITATION
+    return format_citations(tuple((src.book, src.page) for src in item['sources']))
 
 
 def initialize_session_state():
@@ -96,7 +162,7 @@ def auto_initialize_system():
     if st.session_state.rag_engine is None:
         try:
             with st.spinner("🚀 Initializing RAG system..."):
-                st.session_state.rag_engine = RAGEngine()
+                st.session_state.rag_engine = get_rag_engine()
                 logger.info("RAG engine initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize RAG system: {type(e).__name__}: {str(e)}")
@@ -105,8 +171,8 @@ def auto_initialize_system():
     
     # Auto-process new books
     try:
-        book_manager = BookManager()
-        processor = DocumentProcessor()
+        book_manager = get_book_manager()
+        processor = get_document_processor()
         
         # Check for new books
         new_books = book_manager.get_new_books()
@@ -115,10 +181,11 @@ def auto_initialize_system():
         if new_books:
             with st.spinner(f"📚 Processing {len(new_books)} new book(s)..."):
                 result = processor.process_new_books(book_manager)
+                clear_book_caches()
                 
                 # Add new chunks to vector store
                 if result['total_new_chunks'] > 0:
-                    st.session_state.rag_engine.vector_store.add_documents(result['chunks'])
+                    st.session_state.rag_engine.vector_store.add_documents_batched(result['chunks'])
                     logger.info(f"Auto-initialization complete | New books: {result['new_books_processed']} | Chunks: {result['total_new_chunks']}")
                     
                     st.success(
@@ -150,14 +217,15 @@ def rescan_for_new_books():
     """Manually rescan for new books"""
     logger.info("Manual rescan initiated")
     try:
-        book_manager = BookManager()
-        processor = DocumentProcessor()
+        book_manager = get_book_manager()
+        processor = get_document_processor()
         
         with st.spinner("🔍 Scanning for new books..."):
             result = processor.process_new_books(book_manager)
+            clear_book_caches()
             
             if result['total_new_chunks'] > 0:
-                st.session_state.rag_engine.vector_store.add_documents(result['chunks'])
+                st.session_state.rag_engine.vector_store.add_documents_batched(result['chunks'])
                 logger.info(f"Rescan complete | New books: {result['new_books_processed']} | Chunks: {result['total_new_chunks']}")
                 st.success(
                     f"✅ Processed {result['new_books_processed']} new book(s) "
@@ -176,21 +244,23 @@ def reprocess_all_books():
     """Reprocess all books (clear and rebuild)"""
     logger.warning("Reprocess all books initiated")
     try:
-        book_manager = BookManager()
+        book_manager = get_book_manager()
         
         with st.spinner("🔄 Clearing existing data..."):
             # Clear vector store
             st.session_state.rag_engine.vector_store.clear_collection()
+            st.session_state.rag_engine.clear_retrieval_cache()
             # Clear book tracker
             book_manager.clear_all()
             logger.info("Cleared all existing data")
         
         with st.spinner("📚 Reprocessing all books..."):
-            processor = DocumentProcessor()
+            processor = get_document_processor()
             result = processor.process_new_books(book_manager)
+            clear_book_caches()
             
             if result['total_new_chunks'] > 0:
-                st.session_state.rag_engine.vector_store.add_documents(result['chunks'])
+                st.session_state.rag_engine.vector_store.add_documents_batched(result['chunks'])
                 logger.info(f"Reprocess complete | Books: {result['new_books_processed']} | Chunks: {result['total_new_chunks']}")
                 st.success(
                     f"✅ Reprocessed {result['new_books_processed']} book(s) "
@@ -205,128 +275,68 @@ def reprocess_all_books():
         st.error(f"Error reprocessing: {e}")
 
 
-def main():
-    """Main application"""
-    logger.info("=" * 50)
-    logger.info("Chemical Engineering RAG Application Started")
-    logger.info("=" * 50)
-    
-    initialize_session_state()
-    
-    # Auto-initialize on first run
-    auto_initialize_system()
+def render_export_section():
+    """Render the sidebar export options for the current response"""
+    st.header("📥 Export")
     
-    # Header
-    st.markdown('<h1 class="main-header">🧪 Chemical Engineering RAG System</h1>', unsafe_allow_html=True)
-    st.markdown('<p class="sub-header">Ask questions about Chemical Engineering from textbooks or general knowledge</p>', unsafe_allow_html=True)
-    
-    # Sidebar
-    with st.sidebar:
-        st.header("⚙️ System Status")
-        
-        # System stats
-        if st.session_state.rag_engine:
-            stats = st.session_state.rag_engine.get_system_stats()
-            st.metric("Total Chunks", stats['vector_store']['total_chunks'])
-            
-            # Book manager stats
-            book_manager = BookManager()
-            book_stats = book_manager.get_stats()
-            st.metric("Processed Books", book_stats['total_books_processed'])
-        
-        st.divider()
-        
-        # Book management
-        st.header("📚 Book Management")
-        
-        books_count = settings.get_books_count()
-        st.info(f"📁 Books in directory: {books_count}")
-        
+    if st.session_state.current_response:
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("🔍 Rescan", help="Scan for new books"):
-                rescan_for_new_books()
+            if st.button("📄 PDF"):
+                exporter = get_exporter()
+                try:
+                    resp = st.session_state.current_response
+                    pdf_path = exporter.export_to_pdf(
+                        resp['query'],
+                        resp['answer'],
+                        get_citations(resp),
+                        resp['mode']
+                    )
+                    
+                    with open(pdf_path, 'rb') as f:
+                        st.download_button(
+                            "⬇️ Download PDF",
+                            f,
+                            file_name=Path(pdf_path).name,
+                            mime="application/pdf"
+                        )
+                except Exception as e:
+                    st.error(f"Export error: {e}")
         
         with col2:
-            if st.button("🔄 Reprocess All", help="Clear and reprocess all books"):
-                if st.session_state.rag_engine:
-                    reprocess_all_books()
-        
-        st.divider()
-        
-        # Query mode
-        st.header("🔍 Query Mode")
-        use_general = st.toggle(
-            "Use General Knowledge",
-            value=False,
-            help="Toggle between book-based RAG and general knowledge mode"
-        )
-        
-        if use_general:
-            st.info("🌐 General Knowledge Mode")
-        else:
-            st.info("📖 Book-Based RAG Mode")
-        
-        st.divider()
-        
-        # Export options
-        st.header("📥 Export")
-        
-        if st.session_state.current_response:
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                if st.button("📄 PDF"):
-                    exporter = ExportHandler()
-                    try:
-                        resp = st.session_state.current_response
-                        pdf_path = exporter.export_to_pdf(
-                            resp['query'],
-                            resp['answer'],
-                            resp['citations'],
-                            resp['mode']
-                        )
-                        
-                        with open(pdf_path, 'rb') as f:
-                            st.download_button(
-                                "⬇️ Download PDF",
-                                f,
-                                file_name=Path(pdf_path).name,
-                                mime="application/pdf"
-                            )
-                    except Exception as e:
-                        st.error(f"Export error: {e}")
-            
-            with col2:
-                if st.button("📝 DOCX"):
-                    exporter = ExportHandler()
-                    try:
-                        resp = st.session_state.current_response
-                        docx_path = exporter.export_to_docx(
-                            resp['query'],
-                            resp['answer'],
-                            resp['citations'],
-                            resp['mode']
+            if st.button("📝 DOCX"):
+                exporter = get_exporter()
+                try:
+                    resp = st.session_state.current_response
+                    docx_path = exporter.export_to_docx(
+                        resp['query'],
+                        resp['answer'],
+                        get_citations(resp),
+                        resp['mode']
+                    )
+                    
+                    with open(docx_path, 'rb') as f:
+                        st.download_button(
+                            "⬇️ Download DOCX",
+                            f,
+                            file_name=Path(docx_path).name,
+                            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
                         )
-                        
-                        with open(docx_path, 'rb') as f:
-                            st.download_button(
-                                "⬇️ Download DOCX",
-                                f,
-                                file_name=Path(docx_path).name,
-                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                            )
-                    except Exception as e:
-                        st.error(f"Export error: {e}")
-        else:
-            st.info("Submit a query to enable export")
-    
-    # Main content area
-    if st.session_state.rag_engine is None:
-        st.warning("⚠️ System initialization failed. Please check the sidebar for errors.")
-        return
+                except Exception as e:
+                    st.error(f"Export error: {e}")
+    else:
+        st.info("Submit a query to enable export")
+
+
+def render_query_section(rag_engine: RAGEngine, use_general: bool):
+    """
+    Render the question input, stream the answer and show the current response
     
+    Args:
+        rag_engine: Initialized RAG engine
+        use_general: Whether general knowledge mode is selected
+    """
     # Query input
     st.header("💬 Ask a Question")
     
@@ -356,20 +366,30 @@ def main():
             answer_placeholder = st.empty()
             
             # Use streaming query
-            stream_generator = st.session_state.rag_engine.query_stream(
+            stream_generator = rag_engine.query_stream(
                 query,
                 use_general_knowledge=use_general
             )
             
             # Display streaming response manually
-            answer_text = ""
+            parts = []
+            final_result = {}
+            last_render = 0.0
             answer_placeholder.markdown("### 🤖 Generating Answer...")
             
             for chunk in stream_generator:
-                answer_text += chunk
-                # Update the display with accumulated text
-                answer_placeholder.markdown(f"### 🤖 Answer\n\n{answer_text}")
+                # The stream ends with a result dict carrying the sources
+                if isinstance(chunk, dict):
+                    final_result = chunk
+                    continue
+                parts.append(chunk)
+                # Redraw at most once per interval; each redraw resends the whole answer
+                now = time.monotonic()
+                if now - last_render >= STREAM_RENDER_INTERVAL:
+                    answer_placeholder.markdown(f"### 🤖 Answer\n\n{''.join(parts)}")
+                    last_render = now
             
+            answer_text = ''.join(parts)
             logger.info(f"Query completed | Answer length: {len(answer_text)} chars")
             
             # Construct final result
@@ -377,17 +397,9 @@ def main():
                 'answer': answer_text,
                 'query': query,
                 'mode': 'general_knowledge' if use_general else 'book_based',
-                'sources': [],
-                'citations': "Based on general knowledge (not from textbooks)" if use_general else ""
+                'sources': final_result.get('sources', [])
             }
-            
-            # For book-based mode, get sources
-            if not use_general:
-                # Re-run query to get sources (non-streaming)
-                full_result = st.session_state.rag_engine.query(query, use_general_knowledge=False)
-                result['sources'] = full_result.get('sources', [])
-                result['citations'] = full_result.get('citations', '')
-                logger.debug(f"Retrieved {len(result['sources'])} sources for query")
+            logger.debug(f"Retrieved {len(result['sources'])} sources for query")
             
             # Store current response
             st.session_state.current_response = result
@@ -395,15 +407,14 @@ def main():
             # Add to history
             st.session_state.chat_history.append(result)
             
-            # Clear placeholder and rerun to show final formatted response
+            # Clear placeholder; the final formatted response is rendered below
             answer_placeholder.empty()
-            st.rerun()
             
         except Exception as e:
             logger.error(f"Query processing error: {type(e).__name__}: {str(e)}")
             st.error(f"Error: {e}")
-            import traceback
-            st.error(traceback.format_exc())
+            if settings.LOG_LEVEL.upper() == "DEBUG":
+                st.error(traceback.format_exc())
     
     # Display current response
     if st.session_state.current_response:
@@ -422,21 +433,110 @@ def main():
         st.write(resp['answer'])
         
         # Citations
-        if resp['citations']:
+        citations = get_citations(resp)
+        if citations:
             with st.expander("📚 References", expanded=True):
-                st.markdown(resp['citations'])
+                st.markdown(citations)
+
+
+def main():
+    """Main application"""
+    logger.info("=" * 50)
+    logger.info("Chemical Engineering RAG Application Started")
+    logger.info("=" * 50)
+    
+    initialize_session_state()
+    
+    # Auto-initialize on first run
+    auto_initialize_system()
+    
+    # Header
+    st.markdown('<h1 class="main-header">🧪 Chemical Engineering RAG System</h1>', unsafe_allow_html=True)
+    st.markdown('<p class="sub-header">Ask questions about Chemical Engineering from textbooks or general knowledge</p>', unsafe_allow_html=True)
+    
+    # Sidebar
+    with st.sidebar:
+        st.header("⚙️ System Status")
+        
+        # System stats
+        if st.session_state.rag_engine:
+            stats = st.session_state.rag_engine.get_system_stats()
+            st.metric("Total Chunks", stats['vector_store']['total_chunks'])
+            
+            # Book manager stats
+            book_stats = get_book_stats(get_book_manager().revision)
+            st.metric("Processed Books", book_stats['total_books_processed'])
+        
+        st.divider()
+        
+        # Book management
+        st.header("📚 Book Management")
+        
+        books_count = get_books_count(_path_mtime(settings.BOOKS_DIR))
+        st.info(f"📁 Books in directory: {books_count}")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if st.button("🔍 Rescan", help="Scan for new books"):
+                rescan_for_new_books()
+        
+        with col2:
+            if st.button("🔄 Reprocess All", help="Clear and reprocess all books"):
+                if st.session_state.rag_engine:
+                    reprocess_all_books()
+        
+        st.divider()
+        
+        # Query mode
+        st.header("🔍 Query Mode")
+        use_general = st.toggle(
+            "Use General Knowledge",
+            value=False,
+            help="Toggle between book-based RAG and general knowledge mode"
+        )
+        
+        if use_general:
+            st.info("🌐 General Knowledge Mode")
+        else:
+            st.info("📖 Book-Based RAG Mode")
+        
+        st.divider()
+        
+        # Export options (filled in after the query is processed)
+        export_container = st.container()
+    
+    # Main content area
+    if st.session_state.rag_engine is None:
+        with export_container:
+            render_export_section()
+        st.warning("⚠️ System initialization failed. Please check the sidebar for errors.")
+        return
+    
+    render_query_section(st.session_state.rag_engine, use_general)
+    
+    # Export options are rendered after query processing so a new answer
+    # can be exported without rerunning the script
+    with export_container:
+        render_export_section()
     
     # Chat history
     if st.session_state.chat_history:
         st.divider()
         st.header("📜 Chat History")
         
-        for i, item in enumerate(reversed(st.session_state.chat_history[:-1]), 1):
-            with st.expander(f"Q{len(st.session_state.chat_history) - i}: {truncate_text(item['query'], 60)}"):
+        # Newest first, skipping the current response shown above
+        history = st.session_state.chat_history
+        for i in range(len(history) - 2, -1, -1):
+            item = history[i]
+            if '_q_trunc' not in item:
+                item['_q_trunc'] = truncate_text(item['query'], 60)
+            with st.expander(f"Q{i + 1}: {item['_q_trunc']}"):
                 st.write(f"**Mode:** {item['mode'].replace('_', ' ').title()}")
                 st.write(f"**Answer:** {item['answer']}")
-                if item['citations']:
-                    st.write(f"**References:** {item['citations']}")
+                citations = get_citations(item)
+                if citations:
+                    st.write(f"**References:** {citations}")
 
 
 if __name__ == "__main__":
@@ -13,8 +13,12 @@ load_dotenv()
 class Settings:
     """Application settings and configuration"""
     
-    # Project paths
-    BASE_DIR = Path(__file__).parent.parent
+    # No per-instance attributes: lookups go straight to the class and
+    # assigning to a setting on the instance raises AttributeError
+    __slots__ = ()
+    
+    # Project paths (resolved once at import)
+    BASE_DIR = Path(__file__).resolve().parent.parent
     DATA_DIR = BASE_DIR / "data"
     BOOKS_DIR = DATA_DIR / "books"
     CHROMA_DIR = DATA_DIR / "chroma_db"
@@ -25,16 +29,39 @@ class Settings:
     # ChromaDB Settings
     CHROMA_COLLECTION_NAME = "chemical_engineering_books"
     CHROMA_PERSIST_DIRECTORY = str(CHROMA_DIR)
+    CHROMA_ADD_BATCH_SIZE = 2048  # chunks per collection.add call
+    CHROMA_DISTANCE_SPACE = "ip"  # applies to newly created collections only
+    # Optional in-memory ANN sidecar for similarity_search: "" uses Chroma's
+    # HNSW index only, "faiss" adds a FAISS flat/IVF-PQ index and "faiss-sq8"
+    # an 8-bit scalar quantized one (both need faiss-cpu), "turboquant" a
+    # 4-bit rotated numpy index (no extra dependency)
+    ANN_INDEX = os.getenv("ANN_INDEX", "").lower()
+    ANN_BUILD_PAGE_SIZE = 10_000  # embeddings read from Chroma per page when building the sidecar
     
     # Embedding Model
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE = 256  # texts per encode batch
+    QUERY_EMBEDDING_CACHE_SIZE = 1024  # recent query embeddings kept in memory
+    EMBEDDING_FP16 = os.getenv("EMBEDDING_FP16", "true").lower() == "true"  # half precision on CUDA only
+    EMBEDDING_POOL_THRESHOLD = 1000  # CPU only: texts per call above which worker processes encode
+    EMBEDDING_POOL_WORKERS = min(4, (os.cpu_count() or 2) // 2)  # below 2 disables the pool
+    EMBEDDING_CACHE_ENABLED = True  # reuse embeddings of previously seen chunk texts
+    EMBEDDING_CACHE_FILE = CHROMA_DIR / "emb_cache.sqlite"
+    # CPU only: encode with an int8 ONNX Runtime export (needs optimum[onnxruntime])
+    USE_ONNX = os.getenv("USE_ONNX", "false").lower() == "true"
+    ONNX_MODEL_DIR = DATA_DIR / "onnx" / EMBEDDING_MODEL
     
     # Text Chunking Parameters
     CHUNK_SIZE = 1000  # tokens
     CHUNK_OVERLAP = 200  # tokens
     
+    # Ingestion Settings
+    INGEST_MAX_WORKERS = None  # worker processes for PDF parsing (None = CPU count)
+    PAGE_PARALLEL_THRESHOLD = 400  # books with at least this many pages are split across processes
+    
     # RAG Settings
     TOP_K_RESULTS = 8  # Increased for more comprehensive context
+    RETRIEVAL_CACHE_SIZE = 128  # recent (question, top_k) searches kept in memory
     
     # LLM Parameters
     LLM_MODEL = "gemini-2.5-flash"
@@ -75,9 +102,11 @@ class Settings:
     @classmethod
     def get_books_count(cls):
         """Get count of PDF books in the books directory"""
-        if not cls.BOOKS_DIR.exists():
+        try:
+            with os.scandir(cls.BOOKS_DIR) as entries:
+                return sum(1 for entry in entries if entry.name.lower().endswith('.pdf') and entry.is_file())
+        except FileNotFoundError:
             return 0
-        return len(list(cls.BOOKS_DIR.glob("*.pdf")))
 
 
 # Create settings instance
@@ -6,6 +6,7 @@ Run this script to verify your setup and get started
 import os
 import sys
 from pathlib import Path
+from utils.helpers import list_pdf_files
 
 def check_python_version():
     """Check if Python version is compatible"""
@@ -17,33 +18,40 @@ def check_python_version():
     print(f"✅ Python version: {sys.version.split()[0]}")
     return True
 
-def check_directories():
+def scan_directory(path):
+    """Map entry names to os.DirEntry objects for one directory (empty if missing)"""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name: entry for entry in entries}
+    except FileNotFoundError:
+        return {}
+
+def check_directories(root_entries):
     """Check if required directories exist"""
     base_dir = Path(__file__).parent
+    data_entries = scan_directory(base_dir / "data") if "data" in root_entries else {}
     
     required_dirs = [
-        base_dir / "data" / "books",
-        base_dir / "data" / "chroma_db",
-        base_dir / "config",
-        base_dir / "src",
-        base_dir / "utils"
+        (Path("data") / "books", data_entries.get("books")),
+        (Path("data") / "chroma_db", data_entries.get("chroma_db")),
+        (Path("config"), root_entries.get("config")),
+        (Path("src"), root_entries.get("src")),
+        (Path("utils"), root_entries.get("utils"))
     ]
     
     all_exist = True
-    for dir_path in required_dirs:
-        if dir_path.exists():
-            print(f"✅ Directory exists: {dir_path.relative_to(base_dir)}")
+    for dir_path, entry in required_dirs:
+        if entry is not None and entry.is_dir():
+            print(f"✅ Directory exists: {dir_path}")
         else:
-            print(f"❌ Directory missing: {dir_path.relative_to(base_dir)}")
+            print(f"❌ Directory missing: {dir_path}")
             all_exist = False
     
     return all_exist
 
-def check_env_file():
+def check_env_file(root_entries):
     """Check if .env file exists and has API key"""
-    env_path = Path(__file__).parent / ".env"
-    
-    if not env_path.exists():
+    if ".env" not in root_entries:
         print("❌ .env file not found")
         print("   Please copy .env.example to .env and add your API key")
         return False
@@ -51,7 +59,7 @@ def check_env_file():
     print("✅ .env file exists")
     
     # Check if API key is set
-    with open(env_path, 'r') as f:
+    with open(root_entries[".env"].path, 'r') as f:
         content = f.read()
         if "your_gemini_api_key_here" in content or "GOOGLE_API_KEY=" not in content:
             print("⚠️  Warning: API key may not be configured")
@@ -65,12 +73,13 @@ def check_books():
     """Check if PDF books are present"""
     books_dir = Path(__file__).parent / "data" / "books"
     
-    if not books_dir.exists():
+    try:
+        # Same (case-insensitive) PDF filter the app uses, so the counts agree
+        pdf_files = list_pdf_files(books_dir)
+    except FileNotFoundError:
         print("❌ Books directory not found")
         return False
     
-    pdf_files = list(books_dir.glob("*.pdf"))
-    
     if len(pdf_files) == 0:
         print("⚠️  No PDF books found in data/books/")
         print("   Please add 4-5 Chemical Engineering PDF textbooks")
@@ -117,10 +126,13 @@ def main():
     print("=" * 60)
     print()
     
+    # Scan the project root once and share the entries between checks
+    root_entries = scan_directory(Path(__file__).parent)
+    
     checks = [
         ("Python Version", check_python_version),
-        ("Directory Structure", check_directories),
-        ("Environment File", check_env_file),
+        ("Directory Structure", lambda: check_directories(root_entries)),
+        ("Environment File", lambda: check_env_file(root_entries)),
         ("PDF Books", check_books),
         ("Dependencies", check_dependencies)
     ]
@@ -0,0 +1,311 @@
+"""
+ANN Index Module
+Optional in-memory nearest-neighbour index over the collection's embeddings
+"""
+
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Tuple
+import numpy as np
+from utils.logger import get_logger
+
+try:
+    import faiss  # Optional: faiss-cpu or faiss-gpu
+except ImportError:
+    faiss = None
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# IVF-PQ is used once the index starts with at least this many vectors;
+# below it an exact flat scan is already fast
+IVFPQ_MIN_VECTORS = 100_000
+IVFPQ_NLIST = 256  # inverted lists (coarse clusters)
+IVFPQ_M = 48  # sub-quantizers; the dimension must be divisible by this
+IVFPQ_NBITS = 8  # bits per sub-quantizer code
+IVFPQ_TRAIN_SIZE = 50_000  # vectors used to train the quantizers
+IVFPQ_NPROBE = 16  # lists scanned per query
+# The 8-bit scalar quantizer learns per-dimension ranges from this many
+# vectors; until then searches are exact over a flat index
+SQ8_TRAIN_SIZE = 10_000
+
+# TurboQuant: 4-bit codes (two per byte) after a fixed random rotation
+TURBOQUANT_BITS = 4
+TURBOQUANT_SEED = 0  # fixed so rebuilt indexes are identical
+TURBOQUANT_BLOCK_SIZE = 16384  # codes decoded at a time during search
+
+
+def _lloyd_max_normal(bits: int, iterations: int = 200) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Optimal scalar quantizer for a standard normal variable
+    
+    Args:
+        bits: Bits per code
+        iterations: Lloyd iterations
+    
+    Returns:
+        Tuple of (boundaries, centroids)
+    """
+    centroids = np.linspace(-2.5, 2.5, 2 ** bits)
+    for _ in range(iterations):
+        boundaries = (centroids[:-1] + centroids[1:]) / 2
+        edges = np.concatenate(([-np.inf], boundaries, [np.inf]))
+        pdf = np.exp(-edges ** 2 / 2) / math.sqrt(2 * math.pi)
+        cdf = np.array([0.5 * (1 + math.erf(e / math.sqrt(2))) for e in edges])
+        # Each centroid moves to the conditional mean of its interval
+        centroids = (pdf[:-1] - pdf[1:]) / (cdf[1:] - cdf[:-1])
+    return (centroids[:-1] + centroids[1:]) / 2, centroids
+
+
+# Rotated coordinates of a unit vector are close to N(0, 1/d), so one
+# codebook (scaled per dimension count) serves every index
+_LLOYD_MAX_BOUNDARIES, _LLOYD_MAX_CENTROIDS = _lloyd_max_normal(TURBOQUANT_BITS)
+
+
+class _BaseIndex(ABC):
+    """ID bookkeeping and locking shared by the ANN index implementations"""
+    
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self._ids: List[str] = []
+        self._id_set = set()
+        # Adds must not run concurrently with searches
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    @abstractmethod
+    def _add_vectors(self, vectors: np.ndarray) -> None:
+        """Append vectors, in the order of their IDs"""
+    
+    @abstractmethod
+    def _search_vectors(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (scores, positions) arrays of the k best matches per query"""
+    
+    def add(self, ids: List[str], embeddings) -> None:
+        """
+        Add embeddings; IDs already in the index are skipped
+        
+        Args:
+            ids: Chroma document IDs
+            embeddings: Matching embedding vectors
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dimension)
+        
+        with self._lock:
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in self._id_set]
+            if not keep:
+                return
+            if len(keep) < len(ids):
+                vectors = vectors[keep]
+                ids = [ids[i] for i in keep]
+            
+            self._add_vectors(np.ascontiguousarray(vectors))
+            self._ids.extend(ids)
+            self._id_set.update(ids)
+    
+    def search(self, queries, k: int) -> List[List[Tuple[str, float]]]:
+        """
+        Find the k highest inner-product matches for each query
+        
+        Args:
+            queries: Query embedding(s)
+            k: Results per query
+        
+        Returns:
+            One list of (id, score) pairs per query, best first
+        """
+        vectors = np.ascontiguousarray(queries, dtype=np.float32).reshape(-1, self.dimension)
+        
+        with self._lock:
+            if not self._ids:
+                return [[] for _ in range(len(vectors))]
+            scores, positions = self._search_vectors(vectors, min(k, len(self._ids)))
+            ids = self._ids
+        
+        return [
+            [(ids[p], float(s)) for p, s in zip(row_positions, row_scores) if p >= 0]
+            for row_positions, row_scores in zip(positions.tolist(), scores.tolist())
+        ]
+
+
+class FaissIndex(_BaseIndex):
+    """Inner-product FAISS index over normalized embeddings, keyed by Chroma IDs"""
+    
+    def __init__(self, dimension: int, expected_size: int = 0, scalar_quantized: bool = False):
+        """
+        Initialize an empty index
+        
+        Args:
+            dimension: Embedding dimension
+            expected_size: Number of vectors the index will hold; picks the index type
+            scalar_quantized: Store vectors as 8-bit codes (4x smaller than float32)
+        
+        Quantized types are trained once enough vectors have been added
+        (SQ8_TRAIN_SIZE or IVFPQ_TRAIN_SIZE); until then an exact flat
+        index answers searches.
+        """
+        if faiss is None:
+            raise ImportError("faiss is not installed (pip install faiss-cpu)")
+        
+        super().__init__(dimension)
+        self._expected_size = expected_size
+        self._scalar_quantized = scalar_quantized
+        self._train_size = self._get_train_size()
+        self._index = None
+        # Exact index over the vectors added before training (trained types only)
+        self._pending = None
+    
+    def _get_train_size(self) -> int:
+        """Vectors needed to train the index (0 for an untrained flat index)"""
+        if self._scalar_quantized:
+            return SQ8_TRAIN_SIZE
+        if self._expected_size >= IVFPQ_MIN_VECTORS and self.dimension % IVFPQ_M == 0:
+            return IVFPQ_TRAIN_SIZE
+        return 0
+    
+    def _create_trained_index(self, sample: np.ndarray):
+        """Create the quantized FAISS index and train it on sample"""
+        d = self.dimension
+        if self._scalar_quantized:
+            # Values outside the trained per-dimension ranges are clamped
+            index = faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+            index.train(sample)
+            logger.info(f"Created FAISS 8-bit scalar quantized index | Dimension: {d} | Training vectors: {len(sample)}")
+            return index
+        
+        quantizer = faiss.IndexFlatIP(d)
+        index = faiss.IndexIVFPQ(quantizer, d, IVFPQ_NLIST, IVFPQ_M, IVFPQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+        index.train(sample)
+        index.nprobe = IVFPQ_NPROBE
+        logger.info(f"Created FAISS IVF-PQ index | Training vectors: {len(sample)} | Lists: {IVFPQ_NLIST} | M: {IVFPQ_M}")
+        return index
+    
+    def _add_vectors(self, vectors: np.ndarray) -> None:
+        if self._index is not None:
+            self._index.add(vectors)
+            return
+        
+        if not self._train_size:
+            logger.info(f"Created FAISS flat index | Dimension: {self.dimension}")
+            self._index = faiss.IndexFlatIP(self.dimension)
+            self._index.add(vectors)
+            return
+        
+        if self._pending is None:
+            self._pending = faiss.IndexFlatIP(self.dimension)
+        self._pending.add(vectors)
+        if self._pending.ntotal < self._train_size:
+            return
+        
+        # Enough vectors: train on a random sample of them, then move them all
+        # over in their original order so positions still match self._ids
+        pending = self._pending.reconstruct_n(0, self._pending.ntotal)
+        rng = np.random.default_rng(0)
+        sample = pending[np.sort(rng.choice(len(pending), self._train_size, replace=False))]
+        index = self._create_trained_index(sample)
+        index.add(pending)
+        self._index = index
+        self._pending = None
+    
+    def _search_vectors(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        index = self._index if self._index is not None else self._pending
+        return index.search(vectors, k)
+
+
+class TurboQuantIndex(_BaseIndex):
+    """
+    TurboQuant-style compressed index in pure numpy
+    
+    Embeddings are multiplied by a fixed random orthogonal matrix, which
+    makes every coordinate approximately N(0, 1/d), and each coordinate is
+    then quantized to 4 bits with the Lloyd-Max codebook for that
+    distribution, so no training is needed. Codes are packed two per byte
+    (8x smaller than float32). Queries stay in float and are scored
+    against the decoded codes (asymmetric search); scores are divided by
+    each code's reconstructed norm to estimate cosine similarity.
+    """
+    
+    def __init__(self, dimension: int):
+        """
+        Initialize an empty index
+        
+        Args:
+            dimension: Embedding dimension
+        """
+        super().__init__(dimension)
+        
+        # Haar-distributed rotation: QR of a Gaussian matrix with sign fix
+        rng = np.random.default_rng(TURBOQUANT_SEED)
+        q, r = np.linalg.qr(rng.standard_normal((dimension, dimension)))
+        self._rotation = (q * np.sign(np.diag(r))).astype(np.float32)
+        
+        scale = 1.0 / math.sqrt(dimension)
+        self._boundaries = (_LLOYD_MAX_BOUNDARIES * scale).astype(np.float32)
+        self._centroids = (_LLOYD_MAX_CENTROIDS * scale).astype(np.float32)
+        
+        # Odd dimensions get one padding code so every row packs evenly
+        self._padded_dimension = dimension + dimension % 2
+        self._packed = np.empty((0, self._padded_dimension // 2), dtype=np.uint8)
+        self._inv_norms = np.empty(0, dtype=np.float32)
+        logger.info(f"Created TurboQuant index | Dimension: {dimension} | Bits: {TURBOQUANT_BITS}")
+    
+    def _rotate(self, vectors: np.ndarray) -> np.ndarray:
+        """Rotate vectors, padding them to the packed dimension with zeros"""
+        rotated = vectors @ self._rotation
+        if self._padded_dimension != self.dimension:
+            rotated = np.pad(rotated, ((0, 0), (0, 1)))
+        return rotated
+    
+    def _add_vectors(self, vectors: np.ndarray) -> None:
+        codes = np.searchsorted(self._boundaries, self._rotate(vectors)).astype(np.uint8)
+        norms = np.linalg.norm(self._centroids[codes[:, :self.dimension]], axis=1)
+        
+        packed = (codes[:, 0::2] << 4) | codes[:, 1::2]
+        self._packed = np.concatenate([self._packed, packed])
+        self._inv_norms = np.concatenate([self._inv_norms, 1.0 / np.maximum(norms, 1e-12)])
+    
+    def _search_vectors(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Padding coordinates of the query are zero, so padding codes add nothing
+        rotated = self._rotate(vectors).T
+        count = len(self._packed)
+        scores = np.empty((count, rotated.shape[1]), dtype=np.float32)
+        
+        codes = np.empty((min(count, TURBOQUANT_BLOCK_SIZE), self._padded_dimension), dtype=np.uint8)
+        for start in range(0, count, TURBOQUANT_BLOCK_SIZE):
+            block = self._packed[start:start + TURBOQUANT_BLOCK_SIZE]
+            block_codes = codes[:len(block)]
+            block_codes[:, 0::2] = block >> 4
+            block_codes[:, 1::2] = block & 0x0F
+            scores[start:start + len(block)] = self._centroids[block_codes] @ rotated
+        scores *= self._inv_norms[:, None]
+        
+        # Top-k per query (columns), best first
+        scores = scores.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+
+def create_ann_index(kind: str, dimension: int, expected_size: int = 0):
+    """
+    Create an empty ANN index
+    
+    Args:
+        kind: Index kind from settings.ANN_INDEX
+        dimension: Embedding dimension
+        expected_size: Number of vectors the index will hold
+    
+    Returns:
+        Index with add(ids, embeddings), search(queries, k) and len()
+    """
+    if kind == "faiss":
+        return FaissIndex(dimension, expected_size)
+    if kind == "faiss-sq8":
+        return FaissIndex(dimension, expected_size, scalar_quantized=True)
+    if kind == "turboquant":
+        return TurboQuantIndex(dimension)
+    raise ValueError(f"Unknown ANN index: {kind}")
@@ -3,17 +3,80 @@ Book Manager Module
 Tracks which books have been processed and provides smart book management
 """
 
+import os
 import json
+import mmap
+import sqlite3
+import threading
+import struct
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Set, Optional, Iterator
 from datetime import datetime
 from config.settings import settings
+from utils.helpers import list_pdf_files
 from utils.logger import get_logger
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Tracker format version. Version 2 adds 'mtime_ns' so unchanged files are
+# detected with a stat() call; older entries are re-hashed once and upgraded.
+# Version 3 moves the tracker from JSON to SQLite (stored as user_version).
+TRACKER_VERSION = 3
+
+# Tracker table columns, in entry-dict order; 'name' is the book filename
+TRACKER_COLUMNS = (
+    'file_path', 'file_hash', 'hash_algorithm', 'fingerprint_version',
+    'chunk_count', 'processed_date', 'file_size', 'mtime_ns'
+)
+
+# Seconds a writer waits for another process's tracker transaction to finish
+TRACKER_BUSY_TIMEOUT = 30.0
+
+# Hash used for change detection. Entries without 'hash_algorithm' were
+# written with MD5 and are upgraded the next time they are verified.
+HASH_ALGORITHM = "blake2b"
+LEGACY_HASH_ALGORITHM = "md5"
+
+# Sampled fingerprint for change detection: files larger than three samples
+# are hashed from their head, middle and tail plus their size. Bump the
+# version to force every book to be treated as modified.
+FINGERPRINT_VERSION = 1
+FINGERPRINT_SAMPLE_SIZE = 1024 * 1024  # 1 MiB
+
+# Worker threads for parallel change detection (hashlib releases the GIL)
+CHECK_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+
+
+def fingerprint_bytes(data) -> str:
+    """
+    Calculate the change-detection fingerprint of file contents already in memory
+    
+    Gives the same result as BookManager._fingerprint on the same file, so
+    a book read for parsing does not have to be read again for hashing.
+    
+    Args:
+        data: File contents (bytes-like)
+        
+    Returns:
+        Hex digest string
+    """
+    size = len(data)
+    file_hash = hashlib.new(HASH_ALGORITHM)
+    if size <= 3 * FINGERPRINT_SAMPLE_SIZE:
+        file_hash.update(data)
+        return file_hash.hexdigest()
+    
+    view = memoryview(data)
+    for offset in (0, size // 2, size - FINGERPRINT_SAMPLE_SIZE):
+        file_hash.update(view[offset:offset + FINGERPRINT_SAMPLE_SIZE])
+    view.release()
+    file_hash.update(struct.pack('<Q', size))
+    return file_hash.hexdigest()
+
 
 class BookManager:
     """Manage book processing tracking and detection of new books"""
@@ -23,106 +86,411 @@ class BookManager:
         Initialize book manager
         
         Args:
-            tracker_file: Path to JSON tracker file (default: data/book_tracker.json)
+            tracker_file: Path to SQLite tracker database (default: data/book_tracker.db).
+                A JSON tracker with the same name (book_tracker.json) is imported
+                on first use.
         """
-        self.tracker_file = Path(tracker_file) if tracker_file else settings.DATA_DIR / "book_tracker.json"
+        self.tracker_file = Path(tracker_file) if tracker_file else settings.DATA_DIR / "book_tracker.db"
         logger.info(f"Initializing BookManager | Tracker file: {self.tracker_file}")
+        self._lock = threading.Lock()
+        self._defer_save = False
+        self._batch_now = None
+        self._dirty_names = set()
+        self._snapshot = None
+        self._hash_cache = {}
+        self.revision = 0
+        self._conn = self._connect()
         self.processed_books = self._load_tracker()
         logger.info(f"BookManager initialized | Processed books: {len(self.processed_books)}")
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open the tracker database and create its table"""
+        self.tracker_file.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by Streamlit sessions and the hash-check threads; guarded by self._lock
+        conn = sqlite3.connect(str(self.tracker_file), timeout=TRACKER_BUSY_TIMEOUT, check_same_thread=False)
+        # WAL lets readers and a writer from other processes work concurrently;
+        # with WAL, NORMAL sync is still crash-safe and skips an fsync per commit
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS books ("
+            "name TEXT PRIMARY KEY, file_path TEXT, file_hash TEXT, hash_algorithm TEXT, "
+            "fingerprint_version INTEGER, chunk_count INTEGER, processed_date TEXT, "
+            "file_size INTEGER, mtime_ns INTEGER)"
+        )
+        if conn.execute("PRAGMA user_version").fetchone()[0] < TRACKER_VERSION:
+            # New database: import the JSON tracker once, if there is one
+            self._migrate_json_tracker(conn)
+            conn.execute(f"PRAGMA user_version = {TRACKER_VERSION}")
+        conn.commit()
+        return conn
+    
+    def _migrate_json_tracker(self, conn: sqlite3.Connection) -> None:
+        """Import books from a legacy JSON tracker into a new database"""
+        json_file = self.tracker_file.with_suffix('.json')
+        if not json_file.exists():
+            return
+        
+        try:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                books = json.load(f).get('processed_books', {})
+        except Exception as e:
+            logger.error(f"Error reading legacy tracker file: {type(e).__name__}: {str(e)}")
+            return
+        
+        with conn:
+            conn.executemany(
+                self._upsert_sql(),
+                [self._entry_row(name, entry) for name, entry in books.items()]
+            )
+        logger.info(f"Imported legacy tracker: {json_file} | Books: {len(books)}")
+    
+    def _upsert_sql(self) -> str:
+        """SQL statement that inserts or replaces one book row"""
+        placeholders = ", ".join("?" * (len(TRACKER_COLUMNS) + 1))
+        return f"INSERT OR REPLACE INTO books (name, {', '.join(TRACKER_COLUMNS)}) VALUES ({placeholders})"
+    
+    def _entry_row(self, name: str, entry: Dict[str, Any]) -> tuple:
+        """Convert a tracker entry into a database row"""
+        return (name,) + tuple(entry.get(column) for column in TRACKER_COLUMNS)
+    
+    def _get_data_version(self) -> int:
+        """Get SQLite's data_version, which changes when another connection commits"""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+    
     def _load_tracker(self) -> Dict[str, Any]:
-        """Load the book tracker from JSON file"""
-        if self.tracker_file.exists():
+        """Load the book tracker from the database"""
+        with self._lock:
             try:
-                with open(self.tracker_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    books = data.get('processed_books', {})
-                    logger.debug(f"Loaded tracker file | Books: {len(books)}")
-                    return books
-            except Exception as e:
-                logger.error(f"Error loading tracker file: {type(e).__name__}: {str(e)}")
+                rows = self._conn.execute(f"SELECT name, {', '.join(TRACKER_COLUMNS)} FROM books").fetchall()
+                self._data_version = self._get_data_version()
+            except sqlite3.Error as e:
+                logger.error(f"Error loading tracker database: {type(e).__name__}: {str(e)}")
                 return {}
-        logger.debug("Tracker file does not exist, starting fresh")
-        return {}
+        
+        books = {}
+        for name, *values in rows:
+            books[name] = {
+                column: value for column, value in zip(TRACKER_COLUMNS, values)
+                if value is not None
+            }
+        self.revision += 1
+        logger.debug(f"Loaded tracker database | Books: {len(books)}")
+        return books
     
     def _save_tracker(self) -> None:
-        """Save the book tracker to JSON file"""
+        """Write pending tracker changes to the database"""
+        with self._lock:
+            names, self._dirty_names = self._dirty_names, set()
+            upserts = [
+                self._entry_row(name, self.processed_books[name])
+                for name in names if name in self.processed_books
+            ]
+            deletes = [(name,) for name in names if name not in self.processed_books]
+            try:
+                with self._conn:
+                    self._conn.executemany(self._upsert_sql(), upserts)
+                    self._conn.executemany("DELETE FROM books WHERE name = ?", deletes)
+                self.revision += 1
+                logger.debug(f"Tracker saved | Updated: {len(upserts)} | Removed: {len(deletes)}")
+            except sqlite3.Error as e:
+                logger.error(f"Error saving tracker database: {type(e).__name__}: {str(e)}")
+    
+    def _tracker_data(self) -> Dict[str, Any]:
+        """Build the JSON export contents"""
+        return {
+            'tracker_version': TRACKER_VERSION,
+            'processed_books': self.processed_books,
+            'last_updated': datetime.now().isoformat()
+        }
+    
+    def export_pretty(self, output_path: str = None) -> Path:
+        """
+        Export the tracker as indented JSON, for human inspection or older tools
+        
+        Args:
+            output_path: Destination file (default: book_tracker.pretty.json next to the tracker)
+            
+        Returns:
+            Path of the written file
+        """
+        output = Path(output_path) if output_path else self.tracker_file.with_suffix('.pretty.json')
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(self._tracker_data(), f, indent=2)
+        logger.info(f"Tracker exported: {output}")
+        return output
+    
+    def _request_save(self, file_name: str) -> None:
+        """
+        Save a changed (or removed) entry now, or queue it while saves are deferred
+        
+        Args:
+            file_name: Name of the book whose entry changed
+        """
+        self._dirty_names.add(file_name)
+        if not self._defer_save:
+            self._save_tracker()
+    
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Defer tracker saves inside the block and save once on exit
+        
+        Books marked inside the batch share one processed_date. Nested
+        batches join the outermost one.
+        """
+        if self._defer_save:
+            yield
+            return
+        
+        self._defer_save = True
+        self._batch_now = datetime.now().isoformat()
         try:
-            self.tracker_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.tracker_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'processed_books': self.processed_books,
-                    'last_updated': datetime.now().isoformat()
-                }, f, indent=2)
-            logger.debug(f"Tracker file saved | Books: {len(self.processed_books)}")
-        except Exception as e:
-            logger.error(f"Error saving tracker file: {type(e).__name__}: {str(e)}")
+            yield
+        finally:
+            self._defer_save = False
+            self._batch_now = None
+            if self._dirty_names:
+                self._save_tracker()
+    
+    def reload(self) -> None:
+        """Reload tracking data from the tracker database"""
+        self.processed_books = self._load_tracker()
+        self._snapshot = None
+        logger.info(f"Tracker reloaded | Processed books: {len(self.processed_books)}")
     
-    def _calculate_file_hash(self, file_path: Path) -> str:
+    def reload_if_changed(self) -> bool:
         """
-        Calculate MD5 hash of a file
+        Reload tracking data if another connection changed the tracker since it was last read
+        
+        Returns:
+            True if the tracker was reloaded
+        """
+        with self._lock:
+            changed = self._get_data_version() != self._data_version
+        if not changed:
+            return False
+        logger.debug("Tracker database changed by another connection")
+        self.reload()
+        return True
+    
+    def _calculate_file_hash(self, file_path: Path, algorithm: str = HASH_ALGORITHM) -> str:
+        """
+        Calculate hash of a file
+        
+        Args:
+            file_path: Path to file
+            algorithm: hashlib algorithm name (default: HASH_ALGORITHM)
+            
+        Returns:
+            Hex digest string
+        """
+        file_hash = hashlib.new(algorithm)
+        with open(file_path, 'rb') as f:
+            fd = f.fileno()
+            if os.fstat(fd).st_size == 0:
+                # mmap cannot map an empty file
+                return file_hash.hexdigest()
+            
+            if hasattr(os, 'posix_fadvise'):
+                # The file is read front to back; let the kernel read ahead
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            
+            # Hash straight from the page cache without copying into Python
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                file_hash.update(mm)
+        return file_hash.hexdigest()
+    
+    def _fingerprint(self, file_path: Path) -> str:
+        """
+        Calculate a sampled fingerprint of a file for change detection
+        
+        Small files are hashed in full. Larger files hash three samples
+        (head, middle, tail) and the file size, so the cost is constant
+        regardless of book size. This is not a cryptographic digest of
+        the whole file.
         
         Args:
             file_path: Path to file
             
         Returns:
-            MD5 hash string
+            Hex digest string
         """
-        md5_hash = hashlib.md5()
+        size = file_path.stat().st_size
+        if size <= 3 * FINGERPRINT_SAMPLE_SIZE:
+            return self._calculate_file_hash(file_path)
+        
+        file_hash = hashlib.new(HASH_ALGORITHM)
         with open(file_path, 'rb') as f:
-            # Read in chunks to handle large files
-            for chunk in iter(lambda: f.read(4096), b""):
-                md5_hash.update(chunk)
-        return md5_hash.hexdigest()
+            for offset in (0, size // 2, size - FINGERPRINT_SAMPLE_SIZE):
+                f.seek(offset)
+                file_hash.update(f.read(FINGERPRINT_SAMPLE_SIZE))
+        file_hash.update(struct.pack('<Q', size))
+        return file_hash.hexdigest()
     
-    def is_processed(self, file_path: Path) -> bool:
+    def is_processed(self, file_path: Path, stat: os.stat_result = None) -> bool:
         """
         Check if a book has been processed
         
         Args:
             file_path: Path to PDF file
+            stat: Stat result for the file, if already known (e.g. from scandir)
             
         Returns:
             True if book is already processed and unchanged
         """
         file_name = file_path.name
+        entry = self.processed_books.get(file_name)
         
-        if file_name not in self.processed_books:
+        if entry is None:
             logger.debug(f"Book not in tracker: {file_name}")
             return False
         
+        # Unchanged size and mtime means unchanged file; skip hashing
+        if stat is None:
+            stat = file_path.stat()
+        if stat.st_size == entry.get('file_size') and stat.st_mtime_ns == entry.get('mtime_ns'):
+            return True
+        
         # Check if file has been modified (compare hash)
-        current_hash = self._calculate_file_hash(file_path)
-        stored_hash = self.processed_books[file_name].get('file_hash', '')
+        fingerprint_version = entry.get('fingerprint_version')
+        if fingerprint_version == FINGERPRINT_VERSION:
+            current_hash = self._fingerprint(file_path)
+        elif fingerprint_version is None:
+            # Entry predates fingerprints and stores a full-file hash
+            algorithm = entry.get('hash_algorithm', LEGACY_HASH_ALGORITHM)
+            current_hash = self._calculate_file_hash(file_path, algorithm)
+        else:
+            logger.info(f"Book fingerprint outdated (v{fingerprint_version}): {file_name}")
+            return False
+        stored_hash = entry.get('file_hash', '')
         
         is_same = current_hash == stored_hash
-        if not is_same:
+        if is_same:
+            # Content unchanged (e.g. touched, or an entry from an older tracker
+            # version); record the stat so the next scan skips hashing
+            if fingerprint_version is None:
+                entry['file_hash'] = self._fingerprint(file_path)
+                entry['hash_algorithm'] = HASH_ALGORITHM
+                entry['fingerprint_version'] = FINGERPRINT_VERSION
+            entry['file_size'] = stat.st_size
+            entry['mtime_ns'] = stat.st_mtime_ns
+            self._request_save(file_name)
+        else:
             logger.info(f"Book modified (hash mismatch): {file_name}")
+            if fingerprint_version == FINGERPRINT_VERSION:
+                # Keep the fingerprint for mark_as_processed once the book is re-ingested
+                self._hash_cache[file_name] = (stat.st_size, stat.st_mtime_ns, current_hash)
         
         return is_same
     
-    def mark_as_processed(self, file_path: Path, chunk_count: int) -> None:
+    def check_processed(
+        self,
+        file_paths: List[Path],
+        stats: List[os.stat_result] = None
+    ) -> List[bool]:
+        """
+        Check several books at once, hashing them in parallel threads
+        
+        Tracker writes from the checks are deferred and saved once at the end.
+        
+        Args:
+            file_paths: Paths to PDF files
+            stats: Stat results matching file_paths, if already known
+            
+        Returns:
+            List of is_processed results, in input order
+        """
+        if stats is None:
+            stats = [None] * len(file_paths)
+        
+        if len(file_paths) <= 1:
+            return [self.is_processed(p, st) for p, st in zip(file_paths, stats)]
+        
+        workers = min(len(file_paths), CHECK_MAX_WORKERS)
+        with self.batch(), ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self.is_processed, file_paths, stats))
+        
+        return results
+    
+    def snapshot_processed(
+        self,
+        file_paths: List[Path],
+        stats: List[os.stat_result] = None
+    ) -> Set[str]:
+        """
+        Get the names of books that are processed and unchanged
+        
+        The result is memoized on the directory signature (paths, sizes and
+        modification times), so scanning an unchanged directory again in the
+        same session skips the per-file checks.
+        
+        Args:
+            file_paths: Paths to PDF files
+            stats: Stat results matching file_paths, if already known
+            
+        Returns:
+            Set of unchanged, already processed book filenames
+        """
+        if stats is None:
+            stats = [p.stat() for p in file_paths]
+        
+        signature = tuple(
+            (str(p), st.st_size, st.st_mtime_ns)
+            for p, st in zip(file_paths, stats)
+        )
+        if self._snapshot is not None and self._snapshot[0] == signature:
+            return self._snapshot[1]
+        
+        processed = {
+            p.name for p, done in zip(file_paths, self.check_processed(file_paths, stats))
+            if done
+        }
+        self._snapshot = (signature, processed)
+        return processed
+    
+    def mark_as_processed(self, file_path: Path, chunk_count: int, file_hash: str = None) -> None:
         """
         Mark a book as processed
         
         Args:
             file_path: Path to PDF file
             chunk_count: Number of chunks created
+            file_hash: Fingerprint already computed while reading the file (see
+                fingerprint_bytes); otherwise reused from change detection or
+                calculated from disk
         """
         file_name = file_path.name
-        file_hash = self._calculate_file_hash(file_path)
+        stat = file_path.stat()
+        cached = self._hash_cache.pop(file_name, None)
+        if file_hash is None and cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            file_hash = cached[2]
+        if file_hash is None:
+            file_hash = self._fingerprint(file_path)
         
+        self._snapshot = None
         self.processed_books[file_name] = {
             'file_path': str(file_path),
             'file_hash': file_hash,
+            'hash_algorithm': HASH_ALGORITHM,
+            'fingerprint_version': FINGERPRINT_VERSION,
             'chunk_count': chunk_count,
-            'processed_date': datetime.now().isoformat(),
-            'file_size': file_path.stat().st_size
+            'processed_date': self._batch_now or datetime.now().isoformat(),
+            'file_size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns
         }
         
-        self._save_tracker()
+        self._request_save(file_name)
         logger.info(f"Marked as processed: {file_name} | Chunks: {chunk_count}")
     
+    def clear_hash_cache(self) -> None:
+        """Drop fingerprints kept from change detection (e.g. after an ingest batch)"""
+        self._hash_cache.clear()
+    
     def get_new_books(self, books_directory: Path = None) -> List[Path]:
         """
         Get list of books that need processing (new or modified)
@@ -141,13 +509,13 @@ class BookManager:
             return []
         
         # Get all PDF files
-        all_pdfs = list(books_dir.glob("*.pdf"))
+        entries = list_pdf_files(books_dir)
+        all_pdfs = [Path(entry.path) for entry in entries]
+        stats = [entry.stat() for entry in entries]
         
         # Filter to only new or modified books
-        new_books = [
-            pdf for pdf in all_pdfs
-            if not self.is_processed(pdf)
-        ]
+        processed = self.snapshot_processed(all_pdfs, stats)
+        new_books = [pdf for pdf in all_pdfs if pdf.name not in processed]
         
         logger.info(f"Found {len(new_books)} new/modified books out of {len(all_pdfs)} total")
         return new_books
@@ -182,13 +550,22 @@ class BookManager:
         """
         if file_name in self.processed_books:
             del self.processed_books[file_name]
-            self._save_tracker()
+            self._snapshot = None
+            self._request_save(file_name)
     
     def clear_all(self) -> None:
         """Clear all tracking data (for full reprocessing)"""
         logger.warning("Clearing all book tracking data")
-        self.processed_books = {}
-        self._save_tracker()
+        with self._lock:
+            self.processed_books = {}
+            self._dirty_names = set()
+            self._snapshot = None
+            try:
+                with self._conn:
+                    self._conn.execute("DELETE FROM books")
+                self.revision += 1
+            except sqlite3.Error as e:
+                logger.error(f"Error clearing tracker database: {type(e).__name__}: {str(e)}")
         logger.info("All book tracking data cleared")
     
     def get_stats(self) -> Dict[str, Any]:
@@ -3,12 +3,17 @@ Document Processing Module
 Handles PDF extraction, text chunking, and metadata management for Chemical Engineering books
 """
 
+import os
+import multiprocessing
 import fitz  # PyMuPDF
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
-from utils.helpers import clean_text, extract_book_name
+from typing import List, Dict, Any, Tuple, Iterable, Iterator, Optional
+from src.io_backend import read_pdf_bytes
+from src.book_manager import fingerprint_bytes
+from utils.helpers import clean_text, extract_book_name, list_pdf_files
 from config.settings import settings
-from utils.logger import get_logger, log_execution_time, LogContext
+from utils.logger import get_logger, init_worker_logging, log_execution_time, LogContext
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -30,15 +35,19 @@ class DocumentProcessor:
         logger.info(f"DocumentProcessor initialized | Chunk size: {self.chunk_size} | Overlap: {self.chunk_overlap}")
     
     @log_execution_time
-    def load_pdf(self, file_path: str) -> Tuple[str, Dict[str, Any]]:
+    def load_pdf(self, file_path: str) -> Tuple[Iterator[Tuple[int, str]], Dict[str, Any]]:
         """
-        Extract text and metadata from a PDF file
+        Open a PDF file and read its metadata
+        
+        Page text is extracted lazily: the returned iterator yields cleaned
+        text one page at a time, so a whole book is never held in memory.
+        The document is closed once the iterator is exhausted.
         
         Args:
             file_path: Path to PDF file
             
         Returns:
-            Tuple of (extracted_text, metadata)
+            Tuple of (page iterator of (page_number, text), metadata)
         """
         pdf_path = Path(file_path)
         logger.debug(f"Loading PDF: {pdf_path.name}")
@@ -48,48 +57,108 @@ class DocumentProcessor:
             raise FileNotFoundError(f"PDF file not found: {file_path}")
         
         try:
-            # Open PDF
-            doc = fitz.open(file_path)
+            # Open PDF from an in-memory copy read in one pass, and fingerprint
+            # the same bytes so the tracker does not read the file again
+            data = read_pdf_bytes(pdf_path)
+            file_hash = fingerprint_bytes(data)
+            doc = fitz.open(stream=data, filetype="pdf")
             page_count = len(doc)
             logger.info(f"Opened PDF: {pdf_path.name} | Pages: {page_count}")
             
-            # Extract text from all pages
-            full_text = ""
-            for page_num, page in enumerate(doc, start=1):
-                text = page.get_text()
-                full_text += f"\n--- Page {page_num} ---\n{text}"
-                if page_num % 10 == 0:
-                    logger.debug(f"Extracted text from {page_num}/{page_count} pages")
-            
             # Extract metadata
             metadata = {
                 'book_name': extract_book_name(file_path),
                 'file_path': str(pdf_path),
                 'total_pages': page_count,
                 'title': doc.metadata.get('title', extract_book_name(file_path)),
-                'author': doc.metadata.get('author', 'Unknown')
+                'author': doc.metadata.get('author', 'Unknown'),
+                'file_hash': file_hash
             }
             
-            doc.close()
-            
-            # Clean text
-            full_text = clean_text(full_text)
-            text_length = len(full_text)
-            logger.info(f"PDF loaded successfully: {pdf_path.name} | Text length: {text_length:,} chars")
+            # Large books are split into page ranges across worker processes,
+            # unless this already is a worker processing one book of many
+            workers = min(page_count, settings.INGEST_MAX_WORKERS or os.cpu_count() or 1)
+            if (
+                page_count >= settings.PAGE_PARALLEL_THRESHOLD
+                and workers > 1
+                and multiprocessing.parent_process() is None
+            ):
+                doc.close()
+                return self._iter_pages_parallel(pdf_path, page_count, workers), metadata
             
-            return full_text, metadata
+            return self._iter_pages(doc, pdf_path.name), metadata
             
         except Exception as e:
             logger.error(f"Error loading PDF {pdf_path.name}: {type(e).__name__}: {str(e)}")
             raise
     
+    def _iter_pages(self, doc: fitz.Document, file_name: str) -> Iterator[Tuple[int, str]]:
+        """
+        Yield cleaned text for each page of an open PDF, then close it
+        
+        Args:
+            doc: Open PyMuPDF document
+            file_name: PDF file name (for logging)
+            
+        Yields:
+            Tuple of (page_number, cleaned_text)
+        """
+        page_count = len(doc)
+        text_length = 0
+        try:
+            for page_index in range(page_count):
+                page_num = page_index + 1
+                text = _extract_page_text(doc, page_index)
+                text_length += len(text)
+                yield page_num, text
+                if page_num % 10 == 0:
+                    logger.debug(f"Extracted text from {page_num}/{page_count} pages")
+        finally:
+            doc.close()
+        
+        logger.info(f"PDF loaded successfully: {file_name} | Text length: {text_length:,} chars")
+    
+    def _iter_pages_parallel(self, pdf_path: Path, page_count: int, workers: int) -> Iterator[Tuple[int, str]]:
+        """
+        Yield cleaned text for each page of a large PDF, extracted in worker processes
+        
+        PyMuPDF is not thread-safe, so each worker process opens the document
+        itself and extracts a contiguous range of pages. Ranges are yielded
+        in page order as they complete.
+        
+        Args:
+            pdf_path: Path to PDF file
+            page_count: Number of pages in the document
+            workers: Number of worker processes
+            
+        Yields:
+            Tuple of (page_number, cleaned_text)
+        """
+        # Several ranges per worker keeps workers busy when pages vary in cost
+        range_size = -(-page_count // (workers * 4))
+        starts = list(range(0, page_count, range_size))
+        stops = [min(start + range_size, page_count) for start in starts]
+        logger.info(f"Extracting {page_count} pages in {len(starts)} ranges with {workers} worker processes")
+        
+        text_length = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker_logging) as executor:
+            for pages in executor.map(_extract_page_range, [str(pdf_path)] * len(starts), starts, stops):
+                for page_num, text in pages:
+                    text_length += len(text)
+                    yield page_num, text
+        
+        logger.info(f"PDF loaded successfully: {pdf_path.name} | Text length: {text_length:,} chars")
+    
     @log_execution_time
-    def chunk_text(self, text: str, metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def chunk_text(self, pages: Iterable[Tuple[int, str]], metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        Split text into overlapping chunks
+        Split page text into overlapping chunks
+        
+        Pages are consumed one at a time and only a rolling buffer of about
+        one chunk is kept.
         
         Args:
-            text: Full text to chunk
+            pages: Iterable of (page_number, text) tuples, as from load_pdf
             metadata: Document metadata
             
         Returns:
@@ -102,55 +171,72 @@ class DocumentProcessor:
         # Approximate: 1 token ≈ 4 characters
         char_chunk_size = self.chunk_size * 4
         char_overlap = self.chunk_overlap * 4
-        
-        # Split by pages first to maintain page references
-        pages = text.split('--- Page ')
-        
-        current_chunk = ""
-        current_page = 1
+        step = char_chunk_size - char_overlap
+        
+        # Loop invariants, looked up once per book instead of once per chunk
+        book_name = metadata['book_name']
+        source = metadata['file_path']
+        add_chunk = chunks.append
+        total_chars = 0
+        
+        # Pending page texts are collected in a list and joined only when a
+        # chunk is ready, instead of reallocating a string on every page
+        buffer = []
+        buffer_len = 0
+        page_num = 1
         chunk_id = 0
         
-        for page_section in pages[1:]:  # Skip first empty split
-            # Extract page number
-            try:
-                page_num_str = page_section.split(' ---')[0]
-                page_num = int(page_num_str)
-                page_text = page_section.split('---\n', 1)[1] if '---\n' in page_section else page_section
-            except (ValueError, IndexError):
+        for page_num, page_text in pages:
+            if not page_text:
+                continue
+            
+            # Add page text to current chunk, separating pages with a space
+            if buffer:
+                buffer.append(" ")
+                buffer_len += 1
+            buffer.append(page_text)
+            buffer_len += len(page_text)
+            
+            if buffer_len < char_chunk_size:
                 continue
             
-            # Add page text to current chunk
-            current_chunk += page_text
+            current_chunk = "".join(buffer)
             
             # If chunk is large enough, create a chunk
             while len(current_chunk) >= char_chunk_size:
-                chunk_text = current_chunk[:char_chunk_size]
+                chunk_text = current_chunk[:char_chunk_size].strip()
+                total_chars += len(chunk_text)
                 
                 # Create chunk with metadata
-                chunks.append({
-                    'text': chunk_text.strip(),
+                add_chunk({
+                    'text': chunk_text,
                     'chunk_id': chunk_id,
-                    'book_name': metadata['book_name'],
+                    'book_name': book_name,
                     'page': page_num,
-                    'source': metadata['file_path']
+                    'source': source
                 })
                 
                 # Move to next chunk with overlap
-                current_chunk = current_chunk[char_chunk_size - char_overlap:]
+                current_chunk = current_chunk[step:]
                 chunk_id += 1
+            
+            buffer = [current_chunk] if current_chunk else []
+            buffer_len = len(current_chunk)
         
         # Add remaining text as final chunk
-        if current_chunk.strip():
-            chunks.append({
-                'text': current_chunk.strip(),
+        current_chunk = "".join(buffer).strip()
+        if current_chunk:
+            total_chars += len(current_chunk)
+            add_chunk({
+                'text': current_chunk,
                 'chunk_id': chunk_id,
-                'book_name': metadata['book_name'],
+                'book_name': book_name,
                 'page': page_num,
-                'source': metadata['file_path']
+                'source': source
             })
         
-        avg_chunk_size = sum(len(c['text']) for c in chunks) / len(chunks) if chunks else 0
-        logger.info(f"Created {len(chunks)} chunks | Avg size: {avg_chunk_size:.0f} chars | Book: {metadata.get('book_name', 'Unknown')}")
+        avg_chunk_size = total_chars / len(chunks) if chunks else 0
+        logger.info(f"Created {len(chunks)} chunks | Avg size: {avg_chunk_size:.0f} chars | Book: {book_name}")
         
         return chunks
     
@@ -165,24 +251,70 @@ class DocumentProcessor:
         Returns:
             List of text chunks with metadata
         """
+        return self._process_book_with_hash(file_path)[0]
+    
+    def _process_book_with_hash(self, file_path: str) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Process a single book and return its fingerprint along with the chunks
+        
+        Args:
+            file_path: Path to PDF book
+            
+        Returns:
+            Tuple of (chunks, file_hash)
+        """
         book_name = Path(file_path).name
         logger.info(f"Processing book: {book_name}")
         
         try:
-            # Extract text and metadata
-            text, metadata = self.load_pdf(file_path)
-            
-            # Create chunks
-            chunks = self.chunk_text(text, metadata)
+            # Open PDF and stream its pages into chunks
+            pages, metadata = self.load_pdf(file_path)
+            chunks = self.chunk_text(pages, metadata)
             
             logger.info(f"Book processed successfully: {book_name} | Chunks: {len(chunks)} | Pages: {metadata['total_pages']}")
             
-            return chunks
+            return chunks, metadata['file_hash']
             
         except Exception as e:
             logger.error(f"Failed to process book {book_name}: {type(e).__name__}: {str(e)}")
             raise
     
+    def _process_books_parallel(
+        self,
+        pdf_files: List[Path]
+    ) -> Iterator[Tuple[Path, List[Dict[str, Any]], Optional[str], Optional[Exception]]]:
+        """
+        Parse and chunk books across worker processes
+        
+        Args:
+            pdf_files: PDF files to process
+            
+        Yields:
+            Tuple of (pdf_file, chunks, file_hash, error) in input order; error
+            is set (and chunks empty, file_hash None) when the book failed
+        """
+        workers = min(len(pdf_files), settings.INGEST_MAX_WORKERS or os.cpu_count() or 1)
+        
+        if workers <= 1:
+            for pdf_file in pdf_files:
+                try:
+                    yield (pdf_file, *self._process_book_with_hash(str(pdf_file)), None)
+                except Exception as e:
+                    yield pdf_file, [], None, e
+            return
+        
+        logger.info(f"Processing {len(pdf_files)} books with {workers} worker processes")
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker_logging) as executor:
+            futures = [
+                executor.submit(_parse_and_chunk, str(pdf_file), self.chunk_size, self.chunk_overlap)
+                for pdf_file in pdf_files
+            ]
+            for pdf_file, future in zip(pdf_files, futures):
+                try:
+                    yield (pdf_file, *future.result(), None)
+                except Exception as e:
+                    yield pdf_file, [], None, e
+    
     @log_execution_time
     def process_books_directory(self, directory: str = None) -> List[Dict[str, Any]]:
         """
@@ -202,7 +334,7 @@ class DocumentProcessor:
             raise FileNotFoundError(f"Books directory not found: {books_dir}")
         
         # Get all PDF files
-        pdf_files = list(books_dir.glob("*.pdf"))
+        pdf_files = [Path(entry.path) for entry in list_pdf_files(books_dir)]
         
         if not pdf_files:
             logger.warning(f"No PDF files found in {books_dir}")
@@ -210,21 +342,20 @@ class DocumentProcessor:
         
         logger.info(f"Found {len(pdf_files)} PDF books to process")
         
-        # Process all books
+        # Process all books in parallel
         all_chunks = []
         successful = 0
         failed = 0
         
-        for i, pdf_file in enumerate(pdf_files, 1):
-            try:
-                logger.info(f"Processing book {i}/{len(pdf_files)}: {pdf_file.name}")
-                chunks = self.process_book(str(pdf_file))
-                all_chunks.extend(chunks)
-                successful += 1
-            except Exception as e:
-                logger.error(f"Error processing {pdf_file.name}: {type(e).__name__}: {str(e)}")
+        for i, (pdf_file, chunks, _, error) in enumerate(self._process_books_parallel(pdf_files), 1):
+            if error is not None:
+                logger.error(f"Error processing {pdf_file.name}: {type(error).__name__}: {str(error)}")
                 failed += 1
                 continue
+            
+            logger.info(f"Processed book {i}/{len(pdf_files)}: {pdf_file.name}")
+            all_chunks.extend(chunks)
+            successful += 1
         
         logger.info(f"Batch processing complete | Total chunks: {len(all_chunks)} | Successful: {successful} | Failed: {failed}")
         
@@ -255,15 +386,20 @@ class DocumentProcessor:
             }
         
         # Get all PDF files
-        all_pdfs = list(books_dir.glob("*.pdf"))
+        entries = list_pdf_files(books_dir)
+        all_pdfs = [Path(entry.path) for entry in entries]
+        stats = [entry.stat() for entry in entries]
         logger.info(f"Found {len(all_pdfs)} PDF books in directory")
         
         # Separate new and already processed books
         new_books = []
         skipped_books = []
         
+        # Hash check runs in threads before extraction starts in worker processes;
+        # reuses the snapshot from get_new_books if the directory is unchanged
+        processed = book_manager.snapshot_processed(all_pdfs, stats)
         for pdf_file in all_pdfs:
-            if book_manager.is_processed(pdf_file):
+            if pdf_file.name in processed:
                 skipped_books.append(pdf_file.name)
                 logger.debug(f"Skipping already processed: {pdf_file.name}")
             else:
@@ -272,21 +408,22 @@ class DocumentProcessor:
         
         logger.info(f"New books: {len(new_books)} | Already processed: {len(skipped_books)}")
         
-        # Process new books
+        # Process new books in parallel; tracker updates stay in this process
+        # and are written once at the end of the batch
         all_chunks = []
-        for i, pdf_file in enumerate(new_books, 1):
-            try:
-                logger.info(f"Processing NEW book {i}/{len(new_books)}: {pdf_file.name}")
-                chunks = self.process_book(str(pdf_file))
+        with book_manager.batch():
+            for i, (pdf_file, chunks, file_hash, error) in enumerate(self._process_books_parallel(new_books), 1):
+                if error is not None:
+                    logger.error(f"Error processing {pdf_file.name}: {type(error).__name__}: {str(error)}")
+                    continue
+                
+                logger.info(f"Processed NEW book {i}/{len(new_books)}: {pdf_file.name}")
                 all_chunks.extend(chunks)
                 
                 # Mark as processed
-                book_manager.mark_as_processed(pdf_file, len(chunks))
+                book_manager.mark_as_processed(pdf_file, len(chunks), file_hash)
                 logger.info(f"Marked as processed: {pdf_file.name} | Chunks: {len(chunks)}")
-                
-            except Exception as e:
-                logger.error(f"Error processing {pdf_file.name}: {type(e).__name__}: {str(e)}")
-                continue
+        book_manager.clear_hash_cache()
         
         result = {
             'new_books_processed': len(new_books),
@@ -302,6 +439,53 @@ class DocumentProcessor:
         return result
 
 
+def _extract_page_text(doc: fitz.Document, page_index: int) -> str:
+    """
+    Extract cleaned text from one page of an open PDF
+    
+    Args:
+        doc: Open PyMuPDF document
+        page_index: Zero-based page index
+        
+    Returns:
+        Cleaned page text
+    """
+    # Plain text in content-stream order; skips layout sorting
+    return clean_text(doc[page_index].get_text("text", sort=False))
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """
+    Extract cleaned text from a range of pages (module-level so worker processes can unpickle it)
+    
+    Args:
+        file_path: Path to PDF file
+        start: First zero-based page index
+        stop: Page index to stop before
+        
+    Returns:
+        List of (page_number, cleaned_text) tuples
+    """
+    # Opened by path so each worker only reads the pages it needs
+    with fitz.open(file_path) as doc:
+        return [(i + 1, _extract_page_text(doc, i)) for i in range(start, stop)]
+
+
+def _parse_and_chunk(file_path: str, chunk_size: int, chunk_overlap: int) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Parse and chunk a single PDF (module-level so worker processes can unpickle it)
+    
+    Args:
+        file_path: Path to PDF book
+        chunk_size: Size of text chunks
+        chunk_overlap: Overlap between chunks
+        
+    Returns:
+        Tuple of (chunks, file_hash)
+    """
+    return DocumentProcessor(chunk_size, chunk_overlap)._process_book_with_hash(file_path)
+
+
 # Example usage
 if __name__ == "__main__":
     processor = DocumentProcessor()
@@ -0,0 +1,95 @@
+"""
+Embedding Cache Module
+Persistent SQLite cache of chunk embeddings keyed by a hash of the chunk text
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Union
+import numpy as np
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Seconds to wait for another process's write lock before failing
+CACHE_BUSY_TIMEOUT = 30.0
+# Keys per SELECT ... IN (...) (stays under SQLite's bound-parameter limit)
+CACHE_LOOKUP_BATCH = 500
+
+
+class EmbeddingCache:
+    """Map chunk texts to float32 embeddings for one embedding model"""
+    
+    def __init__(self, cache_file: Union[str, Path], model_name: str):
+        """
+        Open (or create) the cache database
+        
+        Args:
+            cache_file: Path to the SQLite file
+            model_name: Embedding model; entries from other models are ignored
+        """
+        self.cache_file = Path(cache_file)
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by Streamlit sessions and the ingest writer thread; guarded by self._lock
+        self._conn = sqlite3.connect(str(self.cache_file), timeout=CACHE_BUSY_TIMEOUT, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, key BLOB NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, key)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+        logger.info(f"Embedding cache opened: {self.cache_file}")
+    
+    @staticmethod
+    def key(text: str) -> bytes:
+        """Content key for a chunk text"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Look up cached embeddings
+        
+        Args:
+            keys: Keys from key()
+        
+        Returns:
+            Dictionary of key to embedding, for the keys that were cached
+        """
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), CACHE_LOOKUP_BATCH):
+                batch = unique[start:start + CACHE_LOOKUP_BATCH]
+                placeholders = ", ".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                    [self.model_name, *batch]
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+        return found
+    
+    def put_many(self, keys: List[bytes], embeddings: np.ndarray) -> None:
+        """
+        Store embeddings
+        
+        Args:
+            keys: Keys from key()
+            embeddings: Matching embedding rows
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        rows = [(self.model_name, key, vector.tobytes()) for key, vector in zip(keys, vectors)]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector) VALUES (?, ?, ?)",
+                rows
+            )
+        logger.debug(f"Cached {len(rows)} embeddings")
@@ -12,24 +12,149 @@ from reportlab.lib.colors import HexColor
 from docx import Document
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple, Iterator
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from utils.helpers import get_timestamp
+from utils.helpers import get_timestamp, format_citations_list, Source, GENERAL_KNOWLEDGE_CITATION
 from config.settings import settings
 from utils.logger import get_logger, log_execution_time
+import io
 import re
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Markdown patterns stripped from exported text, compiled once at import.
+# They run as separate passes in this order: bold, then italic, then code.
+# A single alternation pass gives different output when the text contains
+# a bare '*' (e.g. 'a * b and **c**')
+_RE_BOLD = re.compile(r'\*\*(.*?)\*\*')
+_RE_ITAL = re.compile(r'\*(.*?)\*')
+_RE_CODE = re.compile(r'`(.*?)`')
+
+
+def _strip_markdown(text: str) -> str:
+    """Remove markdown bold, italic and inline code markers from text"""
+    text = _RE_BOLD.sub(r'\1', text)
+    text = _RE_ITAL.sub(r'\1', text)
+    return _RE_CODE.sub(r'\1', text)
+
+
+@lru_cache(maxsize=32)
+def _clean_and_split(text: str, separator: str = '\n\n') -> Tuple[str, Tuple[str, ...]]:
+    """
+    Remove markdown from text and split it into non-empty, stripped parts
+    
+    Cached, so exporting the same response to both PDF and DOCX cleans it once.
+    
+    Args:
+        text: Raw text
+        separator: Separator to split on (paragraphs by default)
+        
+    Returns:
+        Tuple of (cleaned_text, parts)
+    """
+    cleaned = _strip_markdown(text)
+    parts = tuple(part.strip() for part in cleaned.split(separator) if part.strip())
+    return cleaned, parts
+
+
+def _prepare_sections(query: str, answer: str, citations: str) -> Dict[str, Any]:
+    """
+    Clean and split the parts of a response for export
+    
+    Shared by the PDF and DOCX exporters; the underlying _clean_and_split
+    cache means re-exporting a response does no string work.
+    
+    Args:
+        query: User query
+        answer: Generated answer
+        citations: Citation text
+        
+    Returns:
+        Dictionary with the cleaned 'query', 'answer' paragraphs and
+        'citations' lines
+    """
+    return {
+        'query': _clean_and_split(query)[0],
+        'answer': _clean_and_split(answer)[1],
+        'citations': _clean_and_split(citations, '\n')[1] if citations and citations.strip() else ()
+    }
+
+
+def _history_citations(item: Dict[str, Any]) -> str:
+    """
+    Citation text for a chat history item
+    
+    Session items carry structured 'sources'; an explicit 'citations'
+    string takes precedence when present. General knowledge answers have
+    no sources and get the same reference line the app shows.
+    """
+    citations = item.get('citations')
+    if citations is None:
+        if item.get('mode') == 'general_knowledge':
+            return GENERAL_KNOWLEDGE_CITATION
+        citations = format_citations_list(item.get('sources') or ())
+    return citations
+
+
+def _heading_style(level: int) -> str:
+    """Style name for a heading level, as used by Document.add_heading"""
+    return 'Title' if level == 0 else f'Heading {level}'
+
+
+def _remove_paragraph(paragraph) -> None:
+    """Remove a python-docx paragraph from its document"""
+    element = paragraph._element
+    element.getparent().remove(element)
+
+
+def _save_docx(doc, filepath: Path) -> None:
+    """Serialize a document in memory and write it to disk in one call"""
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    filepath.write_bytes(buffer.getbuffer())
+
 
 class ExportHandler:
     """Handle exporting responses to PDF and DOCX formats"""
     
+    # Shared by all instances; builds the PDF and DOCX of export_both side by side
+    _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="export")
+    
     def __init__(self):
         """Initialize export handler"""
         # Ensure export directory exists
         settings.EXPORT_DIR.mkdir(exist_ok=True)
+        
+        # PDF styles are only read while building, so they are created once
+        # and shared by every export
+        self._styles = getSampleStyleSheet()
+        self._title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=self._styles['Heading1'],
+            fontSize=18,
+            textColor=HexColor('#003366'),
+            spaceAfter=12,
+            alignment=TA_CENTER
+        )
+        self._heading_style = ParagraphStyle(
+            'CustomHeading',
+            parent=self._styles['Heading2'],
+            fontSize=14,
+            textColor=HexColor('#0066CC'),
+            spaceAfter=6,
+            spaceBefore=12
+        )
+        self._history_title_style = ParagraphStyle(
+            'HistoryTitle',
+            parent=self._styles['Heading1'],
+            fontSize=18,
+            textColor=HexColor('#003366'),
+            alignment=TA_CENTER
+        )
+        
         logger.info(f"ExportHandler initialized | Export directory: {settings.EXPORT_DIR}")
     
     def _clean_text_for_export(self, text: str) -> str:
@@ -42,16 +167,8 @@ class ExportHandler:
         Returns:
             Cleaned text
         """
-        # Remove markdown bold
-        text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-        
-        # Remove markdown italic
-        text = re.sub(r'\*(.*?)\*', r'\1', text)
-        
-        # Remove markdown code blocks
-        text = re.sub(r'`(.*?)`', r'\1', text)
-        
-        return text
+        # Remove markdown bold, italic and code
+        return _clean_and_split(text)[0]
     
     @log_execution_time
     def export_to_pdf(
@@ -78,9 +195,10 @@ class ExportHandler:
         logger.info(f"Exporting to PDF | Mode: {mode} | Query length: {len(query)} chars")
         
         # Generate filename
+        timestamp = get_timestamp()
         if not filename:
-            timestamp = get_timestamp().replace(':', '-').replace(' ', '_')
-            filename = f"response_{timestamp}.pdf"
+            file_timestamp = timestamp.replace(':', '-').replace(' ', '_')
+            filename = f"response_{file_timestamp}.pdf"
         
         filepath = settings.EXPORT_DIR / filename
         
@@ -88,62 +206,44 @@ class ExportHandler:
             # Create PDF
             doc = SimpleDocTemplate(str(filepath), pagesize=letter)
             story = []
-            styles = getSampleStyleSheet()
-            
-            # Custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                textColor=HexColor('#003366'),
-                spaceAfter=12,
-                alignment=TA_CENTER
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                textColor=HexColor('#0066CC'),
-                spaceAfter=6,
-                spaceBefore=12
-            )
+            normal_style = self._styles['Normal']
+            title_style = self._title_style
+            heading_style = self._heading_style
             
             # Title
             story.append(Paragraph("Chemical Engineering RAG System", title_style))
             story.append(Spacer(1, 0.2*inch))
             
             # Metadata
-            meta_text = f"<b>Generated:</b> {get_timestamp()}<br/><b>Mode:</b> {mode.replace('_', ' ').title()}"
-            story.append(Paragraph(meta_text, styles['Normal']))
+            meta_text = f"<b>Generated:</b> {timestamp}<br/><b>Mode:</b> {mode.replace('_', ' ').title()}"
+            story.append(Paragraph(meta_text, normal_style))
             story.append(Spacer(1, 0.3*inch))
             
+            sections = _prepare_sections(query, answer, citations)
+            
             # Query
             story.append(Paragraph("Question", heading_style))
-            query_clean = self._clean_text_for_export(query)
-            story.append(Paragraph(query_clean, styles['Normal']))
+            story.append(Paragraph(sections['query'], normal_style))
             story.append(Spacer(1, 0.2*inch))
             
-            # Answer
-            story.append(Paragraph("Answer", heading_style))
-            answer_clean = self._clean_text_for_export(answer)
-            
-            # Split answer into paragraphs
-            for para in answer_clean.split('\n\n'):
-                if para.strip():
-                    story.append(Paragraph(para.strip(), styles['Normal']))
-                    story.append(Spacer(1, 0.1*inch))
+            # Answer, split into paragraphs (heading skipped when empty)
+            if sections['answer']:
+                story.append(Paragraph("Answer", heading_style))
+            story.extend([
+                flowable
+                for para in sections['answer']
+                for flowable in (Paragraph(para, normal_style), Spacer(1, 0.1*inch))
+            ])
             
             # Citations
-            if citations:
+            if sections['citations']:
                 story.append(Spacer(1, 0.2*inch))
                 story.append(Paragraph("References", heading_style))
-                citations_clean = self._clean_text_for_export(citations)
-                
-                for citation in citations_clean.split('\n'):
-                    if citation.strip():
-                        story.append(Paragraph(citation.strip(), styles['Normal']))
-                        story.append(Spacer(1, 0.05*inch))
+                story.extend([
+                    flowable
+                    for citation in sections['citations']
+                    for flowable in (Paragraph(citation, normal_style), Spacer(1, 0.05*inch))
+                ])
             
             # Build PDF
             doc.build(story)
@@ -180,54 +280,54 @@ class ExportHandler:
         logger.info(f"Exporting to DOCX | Mode: {mode} | Query length: {len(query)} chars")
         
         # Generate filename
+        timestamp = get_timestamp()
         if not filename:
-            timestamp = get_timestamp().replace(':', '-').replace(' ', '_')
-            filename = f"response_{timestamp}.docx"
+            file_timestamp = timestamp.replace(':', '-').replace(' ', '_')
+            filename = f"response_{file_timestamp}.docx"
         
         filepath = settings.EXPORT_DIR / filename
         
         try:
-            # Create document
+            # Create document; content is inserted before a trailing leader
+            # paragraph, which is O(1) per insert (add_paragraph rescans the body)
             doc = Document()
+            leader = doc.add_paragraph()
+            add = leader.insert_paragraph_before
             
             # Title
-            title = doc.add_heading('Chemical Engineering RAG System', 0)
+            title = add('Chemical Engineering RAG System', style=_heading_style(0))
             title.alignment = WD_ALIGN_PARAGRAPH.CENTER
             
             # Metadata
-            meta = doc.add_paragraph()
+            meta = add()
             meta.add_run('Generated: ').bold = True
-            meta.add_run(f"{get_timestamp()}\n")
+            meta.add_run(f"{timestamp}\n")
             meta.add_run('Mode: ').bold = True
             meta.add_run(mode.replace('_', ' ').title())
             
-            doc.add_paragraph()  # Spacer
+            add()  # Spacer
             
-            # Query
-            doc.add_heading('Question', 1)
-            query_clean = self._clean_text_for_export(query)
-            doc.add_paragraph(query_clean)
+            sections = _prepare_sections(query, answer, citations)
             
-            # Answer
-            doc.add_heading('Answer', 1)
-            answer_clean = self._clean_text_for_export(answer)
+            # Query
+            add('Question', style=_heading_style(1))
+            add(sections['query'])
             
-            # Split answer into paragraphs
-            for para in answer_clean.split('\n\n'):
-                if para.strip():
-                    doc.add_paragraph(para.strip())
+            # Answer, split into paragraphs (heading skipped when empty)
+            if sections['answer']:
+                add('Answer', style=_heading_style(1))
+            for para in sections['answer']:
+                add(para)
             
             # Citations
-            if citations:
-                doc.add_heading('References', 1)
-                citations_clean = self._clean_text_for_export(citations)
-                
-                for citation in citations_clean.split('\n'):
-                    if citation.strip():
-                        doc.add_paragraph(citation.strip(), style='List Bullet')
+            if sections['citations']:
+                add('References', style=_heading_style(1))
+                for citation in sections['citations']:
+                    add(citation, style='List Bullet')
             
             # Save document
-            doc.save(str(filepath))
+            _remove_paragraph(leader)
+            _save_docx(doc, filepath)
             
             logger.info(f"DOCX exported successfully: {filepath}")
             return str(filepath)
@@ -236,6 +336,36 @@ class ExportHandler:
             logger.error(f"Failed to export DOCX: {type(e).__name__}: {str(e)}")
             raise
     
+    def export_both(
+        self,
+        query: str,
+        answer: str,
+        citations: str,
+        mode: str
+    ) -> Tuple[str, str]:
+        """
+        Export a response to PDF and DOCX concurrently
+        
+        reportlab and python-docx spend much of their time in zlib and XML
+        code that releases the GIL, so the two builds overlap in threads.
+        Cleaned text is shared through the _clean_and_split cache.
+        
+        Args:
+            query: User query
+            answer: Generated answer
+            citations: Citation text
+            mode: Response mode ('book_based' or 'general_knowledge')
+            
+        Returns:
+            Tuple of (pdf_path, docx_path)
+        """
+        # Warm the cache once so the two threads don't both clean the text
+        _prepare_sections(query, answer, citations)
+        
+        pdf_future = self._executor.submit(self.export_to_pdf, query, answer, citations, mode)
+        docx_future = self._executor.submit(self.export_to_docx, query, answer, citations, mode)
+        return pdf_future.result(), docx_future.result()
+    
     def export_chat_history(
         self,
         chat_history: List[Dict[str, Any]],
@@ -246,7 +376,8 @@ class ExportHandler:
         Export entire chat history
         
         Args:
-            chat_history: List of Q&A dictionaries
+            chat_history: List of Q&A dictionaries with 'query', 'answer' and
+                structured 'sources' (or preformatted 'citations')
             format: 'pdf' or 'docx'
             filename: Optional custom filename
             
@@ -262,72 +393,88 @@ class ExportHandler:
     
     def _export_history_pdf(self, chat_history: List[Dict[str, Any]], filename: str = None) -> str:
         """Export chat history to PDF"""
+        timestamp = get_timestamp()
         if not filename:
-            timestamp = get_timestamp().replace(':', '-').replace(' ', '_')
-            filename = f"chat_history_{timestamp}.pdf"
+            file_timestamp = timestamp.replace(':', '-').replace(' ', '_')
+            filename = f"chat_history_{file_timestamp}.pdf"
         
         filepath = settings.EXPORT_DIR / filename
         
-        doc = SimpleDocTemplate(str(filepath), pagesize=letter)
-        story = []
-        styles = getSampleStyleSheet()
+        # Pages are written straight to the open file as ReportLab lays them out
+        with filepath.open('wb') as f:
+            doc = SimpleDocTemplate(f, pagesize=letter)
+            doc.build(list(self._history_pdf_flowables(chat_history, timestamp)))
         
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=HexColor('#003366'),
-            alignment=TA_CENTER
-        )
+        logger.info(f"Chat history PDF exported: {filepath}")
+        return str(filepath)
+    
+    def _history_pdf_flowables(self, chat_history: List[Dict[str, Any]], timestamp: str) -> Iterator[Any]:
+        """
+        Yield the ReportLab flowables for a chat history PDF, item by item
+        
+        Args:
+            chat_history: List of Q&A dictionaries
+            timestamp: Generation time shown under the title
+            
+        Yields:
+            Paragraph and Spacer flowables
+        """
+        normal_style = self._styles['Normal']
+        italic_style = self._styles['Italic']
         
-        story.append(Paragraph("Chemical Engineering RAG - Chat History", title_style))
-        story.append(Paragraph(f"Generated: {get_timestamp()}", styles['Normal']))
-        story.append(Spacer(1, 0.3*inch))
+        # Title
+        yield Paragraph("Chemical Engineering RAG - Chat History", self._history_title_style)
+        yield Paragraph(f"Generated: {timestamp}", normal_style)
+        yield Spacer(1, 0.3*inch)
         
         # Add each Q&A
         for i, item in enumerate(chat_history, 1):
-            story.append(Paragraph(f"<b>Q{i}:</b> {item['query']}", styles['Normal']))
-            story.append(Spacer(1, 0.1*inch))
-            story.append(Paragraph(f"<b>A{i}:</b> {item['answer']}", styles['Normal']))
+            yield Paragraph(f"<b>Q{i}:</b> {item['query']}", normal_style)
+            yield Spacer(1, 0.1*inch)
+            yield Paragraph(f"<b>A{i}:</b> {item['answer']}", normal_style)
             
-            if item.get('citations'):
-                story.append(Spacer(1, 0.05*inch))
-                story.append(Paragraph(f"<i>{item['citations']}</i>", styles['Italic']))
+            citations = _history_citations(item)
+            if citations:
+                yield Spacer(1, 0.05*inch)
+                yield Paragraph(f"<i>{citations}</i>", italic_style)
             
-            story.append(Spacer(1, 0.2*inch))
-        
-        doc.build(story)
-        logger.info(f"Chat history PDF exported: {filepath}")
-        return str(filepath)
+            yield Spacer(1, 0.2*inch)
     
     def _export_history_docx(self, chat_history: List[Dict[str, Any]], filename: str = None) -> str:
         """Export chat history to DOCX"""
+        timestamp = get_timestamp()
         if not filename:
-            timestamp = get_timestamp().replace(':', '-').replace(' ', '_')
-            filename = f"chat_history_{timestamp}.docx"
+            file_timestamp = timestamp.replace(':', '-').replace(' ', '_')
+            filename = f"chat_history_{file_timestamp}.docx"
         
         filepath = settings.EXPORT_DIR / filename
         
+        # Insert before a trailing leader paragraph so long histories scale
+        # linearly (add_paragraph rescans the body on every call)
         doc = Document()
-        title = doc.add_heading('Chemical Engineering RAG - Chat History', 0)
+        leader = doc.add_paragraph()
+        add = leader.insert_paragraph_before
+        
+        title = add('Chemical Engineering RAG - Chat History', style=_heading_style(0))
         title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        doc.add_paragraph(f"Generated: {get_timestamp()}")
+        add(f"Generated: {timestamp}")
         
         # Add each Q&A
         for i, item in enumerate(chat_history, 1):
-            doc.add_heading(f"Question {i}", 2)
-            doc.add_paragraph(item['query'])
+            add(f"Question {i}", style=_heading_style(2))
+            add(item['query'])
             
-            doc.add_heading(f"Answer {i}", 2)
-            doc.add_paragraph(item['answer'])
+            add(f"Answer {i}", style=_heading_style(2))
+            add(item['answer'])
             
-            if item.get('citations'):
-                doc.add_paragraph(item['citations'], style='Intense Quote')
+            citations = _history_citations(item)
+            if citations:
+                add(citations, style='Intense Quote')
             
-            doc.add_paragraph()  # Spacer
+            add()  # Spacer
         
-        doc.save(str(filepath))
+        _remove_paragraph(leader)
+        _save_docx(doc, filepath)
         logger.info(f"Chat history DOCX exported: {filepath}")
         return str(filepath)
 
@@ -343,3 +490,15 @@ if __name__ == "__main__":
     
     pdf_path = exporter.export_to_pdf(test_query, test_answer, test_citations, 'book_based')
     print(f"Test PDF: {pdf_path}")
+    
+    # Test history export: general knowledge items keep their reference line
+    test_history = [
+        {'query': test_query, 'answer': test_answer, 'mode': 'book_based',
+         'sources': [Source("Chemical Engineering Handbook", 45)]},
+        {'query': "What is a heat exchanger?", 'answer': "A device that transfers heat...",
+         'mode': 'general_knowledge', 'sources': []}
+    ]
+    assert _history_citations(test_history[1]) == GENERAL_KNOWLEDGE_CITATION
+    for history_format in ('pdf', 'docx'):
+        history_path = exporter.export_chat_history(test_history, format=history_format)
+        print(f"Test history {history_format.upper()}: {history_path}")
@@ -0,0 +1,58 @@
+"""
+I/O Backend Module
+Reads PDF files into memory for parsing with as few copies and syscalls as possible
+"""
+
+import os
+from pathlib import Path
+from typing import Union
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Read size for each readinto call
+READ_BLOCK_SIZE = 8 * 1024 * 1024  # 8 MB
+
+
+def read_pdf_bytes(file_path: Union[str, Path]) -> bytearray:
+    """
+    Read a whole PDF file into memory
+    
+    The buffer is allocated once at the file's size and filled with
+    readinto, so no intermediate chunks are created and joined. On
+    platforms that support it, the kernel is told the access is
+    sequential so it reads ahead aggressively.
+    
+    Args:
+        file_path: Path to PDF file
+        
+    Returns:
+        File contents
+    """
+    fd = os.open(str(file_path), os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        size = os.fstat(fd).st_size
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        offset = 0
+        with os.fdopen(fd, 'rb', buffering=0, closefd=False) as f:
+            while offset < size:
+                read = f.readinto(view[offset:offset + READ_BLOCK_SIZE])
+                if not read:
+                    break
+                offset += read
+        view.release()
+    finally:
+        os.close(fd)
+    
+    if offset < size:
+        # File shrank while reading
+        del buffer[offset:]
+    
+    logger.debug(f"Read PDF into memory: {Path(file_path).name} | Size: {offset:,} bytes")
+    return buffer
@@ -11,6 +11,36 @@ from utils.logger import get_logger, log_execution_time
 # Initialize logger
 logger = get_logger(__name__)
 
+# Shared Gemini models keyed by API key, so every handler reuses one client and connection
+_MODELS: Dict[str, Any] = {}
+
+
+def _get_model(api_key: str):
+    """
+    Get the shared Gemini model for an API key, creating it on first use
+    
+    Args:
+        api_key: Google API key
+        
+    Returns:
+        Configured GenerativeModel
+    """
+    model = _MODELS.get(api_key)
+    if model is None:
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel(
+            model_name=settings.LLM_MODEL,
+            generation_config={
+                'temperature': settings.LLM_TEMPERATURE,
+                'top_p': settings.LLM_TOP_P,
+                'top_k': settings.LLM_TOP_K,
+                'max_output_tokens': settings.LLM_MAX_TOKENS,
+            }
+        )
+        _MODELS[api_key] = model
+        logger.debug(f"Created Gemini model | Model: {settings.LLM_MODEL}")
+    return model
+
 
 class LLMHandler:
     """Handle Google Gemini LLM interactions"""
@@ -30,19 +60,8 @@ class LLMHandler:
             raise ValueError("Google API key is required")
         
         try:
-            # Configure Gemini
-            genai.configure(api_key=self.api_key)
-            
-            # Initialize model
-            self.model = genai.GenerativeModel(
-                model_name=settings.LLM_MODEL,
-                generation_config={
-                    'temperature': settings.LLM_TEMPERATURE,
-                    'top_p': settings.LLM_TOP_P,
-                    'top_k': settings.LLM_TOP_K,
-                    'max_output_tokens': settings.LLM_MAX_TOKENS,
-                }
-            )
+            # Configure Gemini and reuse the shared model
+            self.model = _get_model(self.api_key)
             
             logger.info(f"Gemini LLM initialized | Model: {settings.LLM_MODEL} | Temp: {settings.LLM_TEMPERATURE}")
         except Exception as e:
@@ -0,0 +1,112 @@
+"""
+ONNX Encoder Module
+Sentence embeddings from an int8-quantized ONNX Runtime export of the embedding model
+"""
+
+from pathlib import Path
+from typing import List, Union
+import numpy as np
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Hub organisation for bare sentence-transformers model names
+DEFAULT_MODEL_ORG = "sentence-transformers"
+QUANTIZED_FILE_NAME = "model_quantized.onnx"
+
+
+class OnnxSentenceEncoder:
+    """
+    Drop-in replacement for the SentenceTransformer.encode calls VectorStore makes
+    
+    The transformer backbone is exported to ONNX once, its MatMul weights
+    are dynamically quantized to int8, and the result is saved under
+    export_dir so later starts load it directly. Token embeddings are
+    mean-pooled over the attention mask, which matches the MiniLM / mpnet
+    sentence-transformers models; models with CLS pooling are not supported.
+    """
+    
+    def __init__(self, model_name: str, export_dir: Union[str, Path], max_seq_length: int = 256):
+        """
+        Load the quantized model, exporting it first if needed
+        
+        Args:
+            model_name: Embedding model name from settings.EMBEDDING_MODEL
+            export_dir: Directory holding the exported model
+            max_seq_length: Tokens per text; longer texts are truncated
+        """
+        # Optional dependency: pip install optimum[onnxruntime]
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+        
+        self.model_name = model_name
+        self.max_seq_length = max_seq_length
+        export_dir = Path(export_dir)
+        hub_name = model_name if "/" in model_name else f"{DEFAULT_MODEL_ORG}/{model_name}"
+        
+        if not (export_dir / QUANTIZED_FILE_NAME).exists():
+            logger.info(f"Exporting embedding model to ONNX: {hub_name} | Directory: {export_dir}")
+            model = ORTModelForFeatureExtraction.from_pretrained(hub_name, export=True)
+            AutoTokenizer.from_pretrained(hub_name).save_pretrained(export_dir)
+            
+            quantizer = ORTQuantizer.from_pretrained(model)
+            quantizer.quantize(
+                save_dir=export_dir,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            )
+        
+        self._tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        self._model = ORTModelForFeatureExtraction.from_pretrained(export_dir, file_name=QUANTIZED_FILE_NAME)
+        logger.info(f"ONNX embedding model loaded: {hub_name} | File: {QUANTIZED_FILE_NAME}")
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        """Embedding dimension"""
+        return self._model.config.hidden_size
+    
+    def encode(
+        self,
+        sentences: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False
+    ) -> np.ndarray:
+        """
+        Embed texts
+        
+        Texts are batched in length order, as SentenceTransformer.encode
+        does, and returned in input order. show_progress_bar and
+        convert_to_numpy are accepted for compatibility; the result is
+        always a numpy array.
+        
+        Args:
+            sentences: List of text strings
+            batch_size: Texts per model call
+            normalize_embeddings: Scale each row to unit length
+        
+        Returns:
+            float32 array with one embedding row per text
+        """
+        embeddings = np.empty((len(sentences), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        order = sorted(range(len(sentences)), key=lambda i: -len(sentences[i]))
+        
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            inputs = self._tokenizer(
+                [sentences[i] for i in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            token_embeddings = self._model(**inputs).last_hidden_state
+            
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            embeddings[batch] = pooled
+        
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings
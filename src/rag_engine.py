@@ -3,20 +3,51 @@ RAG Engine Module
 Orchestrates retrieval and generation for the Chemical Engineering RAG system
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Any, Tuple
 from src.vector_store import VectorStore
 from src.llm_handler import LLMHandler
-from utils.helpers import format_citations_list
+from utils.helpers import format_citations_list, Source
 from config.settings import settings
 from utils.logger import get_logger, log_execution_time
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Source preview length and the marker appended when text is truncated
+_PREVIEW_LEN = 200
+_ELLIPSIS = '…'
+
+
+class _CacheQuestion:
+    """
+    Question argument for the retrieval caches
+    
+    Hashes and compares by the normalized question, so re-asking with
+    different case or surrounding whitespace is a cache hit, while the
+    search itself still embeds the question as the user typed it.
+    """
+    
+    __slots__ = ('text', 'key')
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.key = text.strip().lower()
+    
+    def __hash__(self) -> int:
+        return hash(self.key)
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _CacheQuestion) and self.key == other.key
+
 
 class RAGEngine:
     """Main RAG pipeline orchestrator"""
     
+    # Formats citations while the LLM is generating
+    _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rag")
+    
     def __init__(self):
         """Initialize RAG engine with vector store and LLM"""
         logger.info("Initializing RAG Engine...")
@@ -29,9 +60,90 @@ class RAGEngine:
         except Exception as e:
             logger.error(f"Failed to initialize RAG Engine: {type(e).__name__}: {str(e)}")
             raise
+        
+        # Per-instance retrieval caches (re-asked questions skip the search)
+        self._search_cached = lru_cache(maxsize=settings.RETRIEVAL_CACHE_SIZE)(self._search)
+        self._search_book_cached = lru_cache(maxsize=settings.RETRIEVAL_CACHE_SIZE)(self._search_book)
+        
+        # Bound LLM methods used on every query
+        self._rag_prompt = self.llm.create_rag_prompt
+        self._general_prompt = self.llm.create_general_knowledge_prompt
+        self._generate = self.llm.generate_response
+        self._stream = self.llm.stream_response
+    
+    def _search(self, question: _CacheQuestion, top_k: int, revision: int) -> Tuple[Dict[str, Any], ...]:
+        """Run a similarity search (revision is only part of the cache key)"""
+        return tuple(self.vector_store.similarity_search(question.text, top_k=top_k))
+    
+    def _search_book(self, question: _CacheQuestion, book_name: str, top_k: int, revision: int) -> Tuple[Dict[str, Any], ...]:
+        """Run a book-scoped search (revision is only part of the cache key)"""
+        return tuple(self.vector_store.search_by_book(question.text, book_name, top_k=top_k))
+    
+    def _retrieve_cached(self, question: str, top_k: int = None) -> Tuple[Dict[str, Any], ...]:
+        """
+        Retrieve chunks for a question, reusing recent identical searches
+        
+        The key is the normalized question, top_k and the vector store
+        revision, so adding or clearing documents invalidates old entries.
+        Returned chunks are shared between hits and must not be modified.
+        
+        Args:
+            question: User question
+            top_k: Number of chunks to retrieve
+            
+        Returns:
+            Tuple of relevant chunks
+        """
+        k = top_k or settings.TOP_K_RESULTS
+        return self._search_cached(_CacheQuestion(question), k, self.vector_store.revision)
+    
+    def _retrieve_book_cached(self, question: str, book_name: str, top_k: int = None) -> Tuple[Dict[str, Any], ...]:
+        """
+        Retrieve chunks from one book, reusing recent identical searches
+        
+        Args:
+            question: User question
+            book_name: Name of the book to search in
+            top_k: Number of chunks to retrieve
+            
+        Returns:
+            Tuple of relevant chunks from the specified book
+        """
+        k = top_k or settings.TOP_K_RESULTS
+        return self._search_book_cached(_CacheQuestion(question), book_name, k, self.vector_store.revision)
+    
+    def clear_retrieval_cache(self) -> None:
+        """
+        Drop all cached retrievals
+        
+        Adding or clearing documents through this engine's vector store
+        already invalidates the cache; call this after the collection was
+        changed some other way, or to free memory held by stale entries.
+        """
+        self._search_cached.cache_clear()
+        self._search_book_cached.cache_clear()
+        logger.debug("Retrieval cache cleared")
+    
+    @staticmethod
+    def _citation_sources(chunks) -> List[Source]:
+        """
+        Build citation sources (book and integer page) for retrieved chunks
+        
+        Args:
+            chunks: Retrieved chunks with 'metadata'
+            
+        Returns:
+            List of sources, one per chunk
+        """
+        sources = []
+        append = sources.append
+        for chunk in chunks:
+            meta_get = chunk['metadata'].get
+            append(Source(meta_get('book_name', 'Unknown'), int(meta_get('page', 0))))
+        return sources
     
     @log_execution_time
-    def query_books(self, question: str, top_k: int = None) -> Tuple[str, List[Dict[str, Any]]]:
+    def query_books(self, question: str, top_k: int = None) -> Tuple[str, List[Source]]:
         """
         Query the book-based RAG system
         
@@ -45,7 +157,7 @@ class RAGEngine:
         logger.info(f"Query (books mode) | Question: '{question[:50]}...' | Top-K: {top_k or settings.TOP_K_RESULTS}")
         
         # Retrieve relevant chunks
-        chunks = self.vector_store.similarity_search(question, top_k=top_k)
+        chunks = self._retrieve_cached(question, top_k)
         logger.debug(f"Retrieved {len(chunks)} chunks from vector store")
         
         if not chunks:
@@ -53,18 +165,20 @@ class RAGEngine:
             return "I couldn't find relevant information in the books to answer this question.", []
         
         # Generate response using LLM
-        prompt = self.llm.create_rag_prompt(question, chunks)
-        answer = self.llm.generate_response(prompt)
+        prompt = self._rag_prompt(question, chunks)
+        answer = self._generate(prompt)
         
         # Format sources
-        sources = [
-            {
-                'book': chunk['metadata'].get('book_name', 'Unknown'),
-                'page': chunk['metadata'].get('page', 'N/A'),
-                'text_preview': chunk['text'][:200] + '...' if len(chunk['text']) > 200 else chunk['text']
-            }
-            for chunk in chunks
-        ]
+        sources = []
+        append = sources.append
+        for chunk in chunks:
+            meta_get = chunk['metadata'].get
+            text = chunk['text']
+            append(Source(
+                meta_get('book_name', 'Unknown'),
+                int(meta_get('page', 0)),  # stored as a string in Chroma metadata
+                (text[:_PREVIEW_LEN] + _ELLIPSIS) if len(text) > _PREVIEW_LEN else text
+            ))
         
         logger.info(f"Query completed | Answer length: {len(answer)} chars | Sources: {len(sources)}")
         return answer, sources
@@ -80,8 +194,8 @@ class RAGEngine:
             Answer based on LLM's general knowledge
         """
         logger.info(f"Query (general knowledge mode) | Question: '{question[:50]}...'")
-        prompt = self.llm.create_general_knowledge_prompt(question)
-        answer = self.llm.generate_response(prompt)
+        prompt = self._general_prompt(question)
+        answer = self._generate(prompt)
         logger.info(f"General knowledge query completed | Answer length: {len(answer)} chars")
         return answer
     
@@ -134,25 +248,24 @@ class RAGEngine:
             top_k: Number of chunks to retrieve (for book mode)
             
         Yields:
-            Response text chunks
-            
-        Returns:
-            Final result dictionary with metadata
+            Response text chunks, followed by a final result dictionary
+            with answer, mode, sources and citations (same shape as query())
         """
         mode = "general_knowledge" if use_general_knowledge else "book_based"
         logger.info(f"Streaming query started | Mode: {mode} | Question: '{question[:30]}...'")
         
         if use_general_knowledge:
             # General knowledge mode - stream response
-            prompt = self.llm.create_general_knowledge_prompt(question)
+            prompt = self._general_prompt(question)
             
-            full_answer = ""
-            for chunk in self.llm.stream_response(prompt):
-                full_answer += chunk
+            parts = []
+            for chunk in self._stream(prompt):
+                parts.append(chunk)
                 yield chunk
+            full_answer = "".join(parts)
             
             logger.info(f"Streaming query completed | Mode: {mode} | Answer length: {len(full_answer)} chars")
-            return {
+            yield {
                 'answer': full_answer,
                 'mode': 'general_knowledge',
                 'sources': [],
@@ -161,40 +274,37 @@ class RAGEngine:
         else:
             # Book-based RAG mode
             k = top_k or settings.TOP_K_RESULTS
-            chunks = self.vector_store.similarity_search(question, top_k=k)
+            chunks = self._retrieve_cached(question, k)
             
             if not chunks:
                 error_msg = "No relevant information found in the books."
                 logger.warning(error_msg)
                 yield error_msg
-                return {
+                yield {
                     'answer': error_msg,
                     'mode': 'book_based',
                     'sources': [],
                     'citations': ""
                 }
+                return
+            
+            # Extract sources and format citations while the answer streams
+            sources = self._citation_sources(chunks)
+            citations_future = self._executor.submit(format_citations_list, sources)
             
             # Generate streaming response
-            prompt = self.llm.create_rag_prompt(question, chunks)
+            prompt = self._rag_prompt(question, chunks)
             
-            full_answer = ""
-            for chunk in self.llm.stream_response(prompt):
-                full_answer += chunk
+            parts = []
+            for chunk in self._stream(prompt):
+                parts.append(chunk)
                 yield chunk
+            full_answer = "".join(parts)
             
-            # Extract sources
-            sources = [
-                {
-                    'book': chunk['metadata'].get('book_name', 'Unknown'),
-                    'page': int(chunk['metadata'].get('page', 0))
-                }
-                for chunk in chunks
-            ]
-            
-            citations = format_citations_list(sources)
+            citations = citations_future.result()
             
             logger.info(f"Streaming query completed | Mode: {mode} | Answer length: {len(full_answer)} chars | Sources: {len(sources)}")
-            return {
+            yield {
                 'answer': full_answer,
                 'mode': 'book_based',
                 'sources': sources,
@@ -235,7 +345,7 @@ class RAGEngine:
         """
         logger.info(f"Book-specific query | Book: {book_name} | Question: '{question[:30]}...'")
         k = top_k or settings.TOP_K_RESULTS
-        chunks = self.vector_store.search_by_book(question, book_name, top_k=k)
+        chunks = self._retrieve_book_cached(question, book_name, k)
         
         if not chunks:
             logger.warning(f"No relevant information found in book: {book_name}")
@@ -246,20 +356,15 @@ class RAGEngine:
                 'citations': ""
             }
         
-        # Generate response
-        prompt = self.llm.create_rag_prompt(question, chunks)
-        answer = self.llm.generate_response(prompt)
+        # Extract sources and format citations while the answer is generated
+        sources = self._citation_sources(chunks)
+        citations_future = self._executor.submit(format_citations_list, sources)
         
-        # Extract sources
-        sources = [
-            {
-                'book': chunk['metadata'].get('book_name', 'Unknown'),
-                'page': int(chunk['metadata'].get('page', 0))
-            }
-            for chunk in chunks
-        ]
+        # Generate response
+        prompt = self._rag_prompt(question, chunks)
+        answer = self._generate(prompt)
         
-        citations = format_citations_list(sources)
+        citations = citations_future.result()
         
         logger.info(f"Book-specific query completed | Book: {book_name} | Sources: {len(sources)}")
         return {
@@ -7,15 +7,28 @@ Manages ChromaDB for persistent vector storage and similarity search
 import os
 os.environ['ANONYMIZED_TELEMETRY'] = 'False'
 
-import chromadb
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+import atexit
+import threading
+from itertools import repeat
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Set, Tuple
 from config.settings import settings
 from utils.logger import get_logger, log_execution_time
+from src.embedding_cache import EmbeddingCache
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Metadata for newly created collections. Embeddings are L2-normalized, so
+# inner product ranks identically to cosine similarity without the extra
+# subtraction of the default L2 space.
+COLLECTION_METADATA = {
+    "description": "Chemical Engineering textbook embeddings",
+    "hnsw:space": settings.CHROMA_DISTANCE_SPACE
+}
+
 
 class VectorStore:
     """Manage ChromaDB vector database for document retrieval"""
@@ -24,6 +37,16 @@ class VectorStore:
         """Initialize ChromaDB with persistent storage"""
         logger.info("Initializing VectorStore...")
         
+        # Imported here so importing this module (e.g. for helpers or type
+        # checks) does not load torch, transformers and chromadb
+        import chromadb
+        import torch
+        from sentence_transformers import SentenceTransformer
+        
+        # Bumped whenever the collection contents change so callers can
+        # invalidate anything derived from search results
+        self.revision = 0
+        
         # Initialize ChromaDB client with persistence
         # Use PersistentClient to avoid onnxruntime dependency
         try:
@@ -38,12 +61,53 @@ class VectorStore:
         # Initialize embedding model
         logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
         try:
-            self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
-            logger.info(f"Embedding model loaded successfully: {settings.EMBEDDING_MODEL}")
+            self._inference_mode = getattr(torch, 'inference_mode', torch.no_grad)
+            if settings.USE_ONNX:
+                from src.onnx_encoder import OnnxSentenceEncoder
+                device = "cpu"
+                self.device = device
+                self.embedding_model = OnnxSentenceEncoder(settings.EMBEDDING_MODEL, settings.ONNX_MODEL_DIR)
+            else:
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                self.device = device
+                self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL, device=device)
+                if device == "cuda" and settings.EMBEDDING_FP16:
+                    # Halves memory traffic; vectors are cast to float32 before storage
+                    self.embedding_model.half()
+                # Inference only: no dropout and no autograd bookkeeping on encodes
+                self.embedding_model.eval()
+                for parameter in self.embedding_model.parameters():
+                    parameter.requires_grad_(False)
+            logger.info(f"Embedding model loaded successfully: {settings.EMBEDDING_MODEL} | Device: {device} | FP16: {device == 'cuda' and settings.EMBEDDING_FP16} | ONNX: {settings.USE_ONNX}")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {type(e).__name__}: {str(e)}")
             raise
         
+        # CPU worker pool for bulk encoding, started on first large batch
+        self._pool = None
+        
+        # Unique book names, loaded on first use and kept current by adds and clears
+        self._book_names = None
+        
+        # Persistent text -> embedding cache, so re-ingesting a book skips the model
+        self._embedding_cache = None
+        if settings.EMBEDDING_CACHE_ENABLED:
+            try:
+                # Quantized vectors differ slightly, so they are cached separately
+                cache_model = f"{settings.EMBEDDING_MODEL}:onnx-int8" if settings.USE_ONNX else settings.EMBEDDING_MODEL
+                self._embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_FILE, cache_model)
+            except Exception as e:
+                logger.warning(f"Embedding cache unavailable: {type(e).__name__}: {str(e)}")
+        
+        # Optional ANN sidecar (settings.ANN_INDEX), built from the collection
+        # on first search
+        self._ann_index = None
+        self._ann_disabled = not settings.ANN_INDEX
+        self._ann_lock = threading.Lock()
+        
+        # Repeated queries reuse their embedding instead of re-running the model
+        self._encode_query_cached = lru_cache(maxsize=settings.QUERY_EMBEDDING_CACHE_SIZE)(self._encode_query)
+        
         # Get or create collection without default embedding function
         # We'll use sentence-transformers directly
         try:
@@ -55,27 +119,205 @@ class VectorStore:
         except:
             self.collection = self.client.create_collection(
                 name=settings.CHROMA_COLLECTION_NAME,
-                metadata={"description": "Chemical Engineering textbook embeddings"}
+                metadata=COLLECTION_METADATA
             )
             logger.info(f"Created new collection: {settings.CHROMA_COLLECTION_NAME}")
         
         logger.info("VectorStore initialization complete")
     
     @log_execution_time
-    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def create_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for a list of texts
         
+        Texts already in the embedding cache are not re-encoded.
+        
         Args:
             texts: List of text strings
             
         Returns:
-            List of embedding vectors
+            float32 array with one embedding row per text
         """
         logger.debug(f"Creating embeddings for {len(texts)} texts")
-        embeddings = self.embedding_model.encode(texts, show_progress_bar=False)
-        logger.info(f"Created embeddings | Count: {len(texts)} | Dimensions: {len(embeddings[0]) if len(embeddings) > 0 else 0}")
-        return embeddings.tolist()
+        if self._embedding_cache is None:
+            embeddings = self._encode_texts(texts).astype(np.float32, copy=False)
+        else:
+            cache = self._embedding_cache
+            keys = [cache.key(text) for text in texts]
+            cached = cache.get_many(keys)
+            
+            embeddings = np.empty((len(texts), self.embedding_model.get_sentence_embedding_dimension()), dtype=np.float32)
+            misses = []
+            for i, key in enumerate(keys):
+                vector = cached.get(key)
+                if vector is None:
+                    misses.append(i)
+                else:
+                    embeddings[i] = vector
+            
+            if misses:
+                encoded = self._encode_texts([texts[i] for i in misses])
+                embeddings[misses] = encoded
+                cache.put_many([keys[i] for i in misses], encoded)
+            logger.debug(f"Embedding cache | Hits: {len(texts) - len(misses)} | Misses: {len(misses)}")
+        
+        logger.info(f"Created embeddings | Count: {len(texts)} | Dimensions: {embeddings.shape[1] if len(embeddings) > 0 else 0}")
+        return embeddings
+    
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Run the embedding model over texts
+        
+        Args:
+            texts: List of text strings
+            
+        Returns:
+            Normalized embeddings, one row per text
+        """
+        # Repeated chunks (running headers, blank pages, TOC lines) are
+        # encoded once and their rows copied back to every position
+        unique = {}
+        positions = [unique.setdefault(text, len(unique)) for text in texts]
+        if len(unique) < len(texts):
+            logger.debug(f"Deduplicated texts for encoding | Texts: {len(texts)} | Unique: {len(unique)}")
+            return self._encode_texts(list(unique))[positions]
+        
+        if self._use_pool(len(texts)):
+            embeddings = self.embedding_model.encode_multi_process(
+                texts,
+                self._get_pool(),
+                batch_size=settings.EMBEDDING_BATCH_SIZE
+            )
+            # The pool has no normalize option; match encode(normalize_embeddings=True)
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+            return embeddings
+        
+        # encode() already sorts texts by length before batching (and restores
+        # input order), so batches are padded to near-uniform lengths
+        with self._inference_mode():
+            return self.embedding_model.encode(
+                texts,
+                batch_size=settings.EMBEDDING_BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+    
+    def _use_pool(self, count: int) -> bool:
+        """Whether a batch of count texts should be encoded by the CPU worker pool"""
+        return (
+            self.device == "cpu"
+            and not settings.USE_ONNX  # ONNX Runtime already uses every core
+            and settings.EMBEDDING_POOL_WORKERS >= 2
+            and count > settings.EMBEDDING_POOL_THRESHOLD
+        )
+    
+    def _get_pool(self) -> Dict[str, Any]:
+        """
+        Start the multi-process encoding pool on first use
+        
+        Each worker holds its own copy of the model; the pool is stopped
+        when the interpreter exits.
+        
+        Returns:
+            Pool as returned by start_multi_process_pool
+        """
+        if self._pool is None:
+            workers = settings.EMBEDDING_POOL_WORKERS
+            logger.info(f"Starting embedding worker pool | Workers: {workers}")
+            self._pool = self.embedding_model.start_multi_process_pool(target_devices=['cpu'] * workers)
+            atexit.register(self.embedding_model.stop_multi_process_pool, self._pool)
+        return self._pool
+    
+    def _encode_query(self, query: str) -> np.ndarray:
+        """
+        Generate the embedding for a search query
+        
+        Uses the same normalization as create_embeddings so query and
+        document vectors are comparable. Callers go through
+        _encode_query_cached; the returned array is shared and read-only.
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            Query embedding vector
+        """
+        with self._inference_mode():
+            embedding = self.embedding_model.encode(
+                [query],
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+        vector = embedding[0].astype(np.float32, copy=False)
+        vector.flags.writeable = False
+        return vector
+    
+    @staticmethod
+    def _format_results(results: Dict[str, Any], index: int) -> List[Dict[str, Any]]:
+        """
+        Convert one query's raw Chroma results into result dictionaries
+        
+        Args:
+            results: Raw collection.query output
+            index: Position of the query in the request
+            
+        Returns:
+            List of chunks with text, metadata and distance
+        """
+        documents = results['documents']
+        if not documents or not documents[index]:
+            return []
+        
+        # Pull each query's columns out once and zip them, rather than
+        # re-indexing the result dictionary for every field of every row
+        documents = documents[index]
+        metadatas = results['metadatas'][index]
+        distances = results.get('distances')
+        distances = distances[index] if distances else repeat(None)
+        return [
+            {'text': text, 'metadata': metadata, 'distance': distance}
+            for text, metadata, distance in zip(documents, metadatas, distances)
+        ]
+    
+    def warmup(self) -> None:
+        """Run a throwaway encode so model weights are paged in before the first query"""
+        try:
+            with self._inference_mode():
+                self.embedding_model.encode(["warmup"] * 8, batch_size=8, show_progress_bar=False)
+            logger.debug("Embedding model warmed up")
+        except Exception as e:
+            logger.warning(f"Embedding model warmup failed: {type(e).__name__}: {str(e)}")
+    
+    def _prepare_documents(self, chunks: List[Dict[str, Any]]) -> Tuple[List[str], List[Dict[str, str]], List[str]]:
+        """
+        Extract texts, metadata and IDs from document chunks
+        
+        Args:
+            chunks: List of chunk dictionaries with 'text' and metadata
+            
+        Returns:
+            Tuple of (texts, metadatas, ids)
+        """
+        # One pass over the chunks filling three preallocated columns
+        n = len(chunks)
+        texts, metadatas, ids = [None] * n, [None] * n, [None] * n
+        for i, chunk in enumerate(chunks):
+            book_name = chunk['book_name']
+            chunk_id = chunk['chunk_id']
+            texts[i] = chunk['text']
+            metadatas[i] = {
+                'book_name': book_name,
+                'page': str(chunk['page']),
+                'chunk_id': str(chunk_id),
+                'source': chunk['source']
+            }
+            # Unique ID per chunk
+            ids[i] = f"{book_name}_chunk_{chunk_id}"
+        logger.debug(f"Generated {len(ids)} unique IDs for chunks")
+        
+        return texts, metadatas, ids
     
     @log_execution_time
     def add_documents(self, chunks: List[Dict[str, Any]]) -> None:
@@ -92,39 +334,160 @@ class VectorStore:
         logger.info(f"Adding {len(chunks)} chunks to ChromaDB...")
         
         try:
-            # Extract texts and metadata
-            texts = [chunk['text'] for chunk in chunks]
-            metadatas = [
-                {
-                    'book_name': chunk['book_name'],
-                    'page': str(chunk['page']),
-                    'chunk_id': str(chunk['chunk_id']),
-                    'source': chunk['source']
-                }
-                for chunk in chunks
-            ]
-            
-            # Generate unique IDs
-            ids = [f"{chunk['book_name']}_chunk_{chunk['chunk_id']}" for chunk in chunks]
-            logger.debug(f"Generated {len(ids)} unique IDs for chunks")
+            texts, metadatas, ids = self._prepare_documents(chunks)
             
             # Create embeddings
             embeddings = self.create_embeddings(texts)
             
             # Add to collection
-            self.collection.add(
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas,
-                ids=ids
-            )
+            self._write_batch(texts, metadatas, ids, embeddings)
             
+            self.revision += 1
             logger.info(f"Successfully added {len(chunks)} chunks to ChromaDB | Total docs: {self.collection.count()}")
             
         except Exception as e:
             logger.error(f"Failed to add documents: {type(e).__name__}: {str(e)}")
             raise
     
+    def _write_batch(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, str]],
+        ids: List[str],
+        embeddings: np.ndarray
+    ) -> None:
+        """Write one batch of embedded chunks to Chroma (and the ANN sidecar)"""
+        # Chroma 0.4 only accepts nested lists of Python floats
+        self.collection.add(
+            embeddings=embeddings.tolist(),
+            documents=texts,
+            metadatas=metadatas,
+            ids=ids
+        )
+        # Taken while the sidecar is being built, so a batch that lands after the
+        # builder's reads is added here once the index exists (add skips duplicates)
+        with self._ann_lock:
+            if self._ann_index is not None:
+                self._ann_index.add(ids, embeddings)
+        if self._book_names is not None:
+            self._book_names.update(metadata['book_name'] for metadata in metadatas)
+        logger.debug(f"Added batch | Chunks: {len(ids)}")
+    
+    @log_execution_time
+    def add_documents_batched(self, chunks: List[Dict[str, Any]], batch_size: int = None) -> None:
+        """
+        Add document chunks to ChromaDB in fixed-size batches
+        
+        Each batch is embedded while the previous one is written to Chroma
+        on a background thread, so encoding and HNSW inserts overlap and
+        only two batches of embeddings are held at a time. Each
+        collection.add call receives at most batch_size chunks, which stays
+        under Chroma's maximum batch size.
+        
+        Args:
+            chunks: List of chunk dictionaries with 'text' and metadata
+            batch_size: Chunks per collection.add call (default from settings)
+        """
+        if not chunks:
+            logger.warning("No chunks to add")
+            return
+        
+        size = batch_size or settings.CHROMA_ADD_BATCH_SIZE
+        logger.info(f"Adding {len(chunks)} chunks to ChromaDB in batches of {size}...")
+        
+        try:
+            texts, metadatas, ids = self._prepare_documents(chunks)
+            
+            # Waiting for the pending write before queuing the next one keeps
+            # at most one batch in flight
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="chroma-add") as writer:
+                pending = None
+                for start in range(0, len(chunks), size):
+                    end = start + size
+                    embeddings = self.create_embeddings(texts[start:end])
+                    if pending is not None:
+                        pending.result()
+                    pending = writer.submit(
+                        self._write_batch, texts[start:end], metadatas[start:end], ids[start:end], embeddings
+                    )
+                pending.result()
+            
+            self.revision += 1
+            logger.info(f"Successfully added {len(chunks)} chunks to ChromaDB | Total docs: {self.collection.count()}")
+            
+        except Exception as e:
+            logger.error(f"Failed to add documents: {type(e).__name__}: {str(e)}")
+            raise
+    
+    def _get_ann_index(self):
+        """
+        Return the ANN sidecar, building it from the collection on first use
+        
+        The collection's embeddings are read in pages of
+        settings.ANN_BUILD_PAGE_SIZE, so only one page is held as Python
+        lists at a time. Returns None when no sidecar is configured or it
+        could not be built, in which case searches go to Chroma directly.
+        """
+        if self._ann_index is not None or self._ann_disabled:
+            return self._ann_index
+        
+        with self._ann_lock:
+            if self._ann_index is None and not self._ann_disabled:
+                try:
+                    # Imported here so faiss is only loaded when a sidecar is configured
+                    from src.ann_index import create_ann_index
+                    
+                    page_size = settings.ANN_BUILD_PAGE_SIZE
+                    count = self.collection.count()
+                    index = create_ann_index(
+                        settings.ANN_INDEX,
+                        self.embedding_model.get_sentence_embedding_dimension(),
+                        expected_size=count
+                    )
+                    for offset in range(0, count, page_size):
+                        page = self.collection.get(include=['embeddings'], limit=page_size, offset=offset)
+                        if page['ids']:
+                            index.add(page['ids'], page['embeddings'])
+                    self._ann_index = index
+                    logger.info(f"ANN index built | Type: {settings.ANN_INDEX} | Vectors: {len(index)}")
+                except Exception as e:
+                    self._ann_disabled = True
+                    logger.warning(f"ANN index unavailable, using Chroma search: {type(e).__name__}: {str(e)}")
+        return self._ann_index
+    
+    def _ann_search(self, ann_index, query_embeddings, k: int) -> List[List[Dict[str, Any]]]:
+        """
+        Search the ANN sidecar and fetch the matching documents from Chroma
+        
+        Args:
+            ann_index: Index returned by _get_ann_index
+            query_embeddings: One embedding per query
+            k: Number of results per query
+            
+        Returns:
+            One list of result dictionaries per query (same shape as _format_results)
+        """
+        hits = ann_index.search(query_embeddings, k)
+        wanted = list(dict.fromkeys(doc_id for row in hits for doc_id, _ in row))
+        if not wanted:
+            return [[] for _ in hits]
+        
+        records = self.collection.get(ids=wanted, include=['documents', 'metadatas'])
+        by_id = {
+            doc_id: (document, metadata)
+            for doc_id, document, metadata in zip(records['ids'], records['documents'], records['metadatas'])
+        }
+        
+        # Inner-product scores are reported as Chroma's "ip" distance (1 - score)
+        return [
+            [
+                {'text': by_id[doc_id][0], 'metadata': by_id[doc_id][1], 'distance': 1.0 - score}
+                for doc_id, score in row
+                if doc_id in by_id
+            ]
+            for row in hits
+        ]
+    
     @log_execution_time
     def similarity_search(self, query: str, top_k: int = None) -> List[Dict[str, Any]]:
         """
@@ -142,23 +505,20 @@ class VectorStore:
         
         try:
             # Generate query embedding
-            query_embedding = self.embedding_model.encode([query])[0].tolist()
-            
-            # Search in ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=k
-            )
+            query_embedding = self._encode_query_cached(query)
             
-            # Format results
-            formatted_results = []
-            if results['documents'] and results['documents'][0]:
-                for i in range(len(results['documents'][0])):
-                    formatted_results.append({
-                        'text': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'distance': results['distances'][0][i] if 'distances' in results else None
-                    })
+            ann_index = self._get_ann_index()
+            if ann_index is not None:
+                formatted_results = self._ann_search(ann_index, [query_embedding], k)[0]
+            else:
+                # Search in ChromaDB
+                results = self.collection.query(
+                    query_embeddings=[query_embedding.tolist()],
+                    n_results=k
+                )
+                
+                # Format results
+                formatted_results = self._format_results(results, 0)
             
             logger.info(f"Search complete | Results: {len(formatted_results)} | Query: '{query[:30]}...'")
             return formatted_results
@@ -167,6 +527,50 @@ class VectorStore:
             logger.error(f"Search failed: {type(e).__name__}: {str(e)}")
             raise
     
+    @log_execution_time
+    def similarity_search_batch(self, queries: List[str], top_k: int = None) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several queries with one encode pass and one Chroma query
+        
+        Args:
+            queries: Search queries
+            top_k: Number of results per query (default from settings)
+            
+        Returns:
+            One list of relevant chunks per query, in input order
+        """
+        if not queries:
+            return []
+        
+        k = top_k or settings.TOP_K_RESULTS
+        logger.debug(f"Batch similarity search | Queries: {len(queries)} | Top-K: {k}")
+        
+        try:
+            with self._inference_mode():
+                query_embeddings = self.embedding_model.encode(
+                    queries,
+                    batch_size=32,
+                    show_progress_bar=False,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True
+                )
+            
+            ann_index = self._get_ann_index()
+            if ann_index is not None:
+                formatted_results = self._ann_search(ann_index, query_embeddings, k)
+            else:
+                results = self.collection.query(
+                    query_embeddings=query_embeddings.tolist(),
+                    n_results=k
+                )
+                formatted_results = [self._format_results(results, i) for i in range(len(queries))]
+            logger.info(f"Batch search complete | Queries: {len(queries)} | Results: {sum(map(len, formatted_results))}")
+            return formatted_results
+            
+        except Exception as e:
+            logger.error(f"Batch search failed: {type(e).__name__}: {str(e)}")
+            raise
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the vector store collection
@@ -191,8 +595,13 @@ class VectorStore:
             self.client.delete_collection(settings.CHROMA_COLLECTION_NAME)
             self.collection = self.client.get_or_create_collection(
                 name=settings.CHROMA_COLLECTION_NAME,
-                metadata={"description": "Chemical Engineering textbook embeddings"}
+                metadata=COLLECTION_METADATA
             )
+            # Rebuilt from the (now empty) collection on the next search
+            with self._ann_lock:
+                self._ann_index = None
+            self._book_names = set()
+            self.revision += 1
             logger.info("Collection cleared successfully")
         except Exception as e:
             logger.error(f"Failed to clear collection: {type(e).__name__}: {str(e)}")
@@ -216,24 +625,17 @@ class VectorStore:
         
         try:
             # Generate query embedding
-            query_embedding = self.embedding_model.encode([query])[0].tolist()
+            query_embedding = self._encode_query_cached(query)
             
             # Search with metadata filter
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=[query_embedding.tolist()],
                 n_results=k,
                 where={"book_name": book_name}
             )
             
             # Format results
-            formatted_results = []
-            if results['documents'] and results['documents'][0]:
-                for i in range(len(results['documents'][0])):
-                    formatted_results.append({
-                        'text': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'distance': results['distances'][0][i] if 'distances' in results else None
-                    })
+            formatted_results = self._format_results(results, 0)
             
             logger.info(f"Book search complete | Book: {book_name} | Results: {len(formatted_results)}")
             return formatted_results
@@ -242,6 +644,35 @@ class VectorStore:
             logger.error(f"Book search failed: {type(e).__name__}: {str(e)}")
             raise
     
+    def _get_book_names(self) -> Set[str]:
+        """
+        Get the cached set of book names, scanning the collection on first use
+        
+        Later adds and clears keep the set current, so the metadata is read
+        from Chroma only once.
+        
+        Returns:
+            Set of book names (shared; do not modify)
+        """
+        if self._book_names is not None:
+            return self._book_names
+        
+        logger.debug("Fetching all book names from collection")
+        all_data = self.collection.get(include=['metadatas'])
+        
+        book_names = set()
+        for metadata in all_data['metadatas'] or []:
+            book_name = metadata.get('book_name')
+            if book_name:
+                book_names.add(book_name)
+        self._book_names = book_names
+        
+        if book_names:
+            logger.info(f"Found {len(book_names)} unique books in collection")
+        else:
+            logger.info("No books found in collection")
+        return book_names
+    
     def get_all_book_names(self) -> List[str]:
         """
         Get list of all unique book names in the collection
@@ -249,21 +680,8 @@ class VectorStore:
         Returns:
             List of book names
         """
-        logger.debug("Fetching all book names from collection")
         try:
-            # Query all documents
-            all_data = self.collection.get()
-            
-            if all_data['metadatas']:
-                book_names = set()
-                for metadata in all_data['metadatas']:
-                    book_name = metadata.get('book_name')
-                    if book_name:
-                        book_names.add(book_name)
-                logger.info(f"Found {len(book_names)} unique books in collection")
-                return list(book_names)
-            logger.info("No books found in collection")
-            return []
+            return list(self._get_book_names())
         except Exception as e:
             logger.error(f"Error getting book names: {type(e).__name__}: {str(e)}")
             return []
@@ -280,11 +698,7 @@ class VectorStore:
         """
         logger.debug(f"Checking if book exists: {book_name}")
         try:
-            results = self.collection.get(
-                where={"book_name": book_name},
-                limit=1
-            )
-            exists = len(results['ids']) > 0
+            exists = book_name in self._get_book_names()
             logger.debug(f"Book '{book_name}' exists: {exists}")
             return exists
         except Exception as e:
@@ -2,9 +2,9 @@
 Utility helper functions for the Chemical Engineering RAG System
 """
 
-import re
+import os
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Iterable, NamedTuple
 
 
 def clean_text(text: str) -> str:
@@ -17,19 +17,20 @@ def clean_text(text: str) -> str:
     Returns:
         Cleaned text string
     """
-    # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Remove page numbers (common patterns)
-    text = re.sub(r'\n\d+\n', '\n', text)
-    
-    # Remove excessive newlines
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    
-    # Strip leading/trailing whitespace
-    text = text.strip()
-    
-    return text
+    # Collapse whitespace runs to single spaces and trim; str.split() uses the
+    # same whitespace set as re's \s, in one C-level scan
+    return ' '.join(text.split())
+
+
+# Reference line for answers from general knowledge mode (no book sources)
+GENERAL_KNOWLEDGE_CITATION = "Based on general knowledge (not from textbooks)"
+
+
+class Source(NamedTuple):
+    """A retrieved chunk's citation details (page 0 when unknown)"""
+    book: str
+    page: int
+    text_preview: str = ''
 
 
 def format_citation(book_name: str, page_number: int = None) -> str:
@@ -48,26 +49,20 @@ def format_citation(book_name: str, page_number: int = None) -> str:
     return f"**{book_name}**"
 
 
-def format_citations_list(sources: List[Dict[str, Any]]) -> str:
+def format_citations_list(sources: Iterable[Source]) -> str:
     """
     Format a list of citations
     
     Args:
-        sources: List of source dictionaries with 'book' and 'page' keys
+        sources: Iterable of Source tuples (a generator is consumed lazily)
         
     Returns:
-        Formatted citations as markdown string
+        Formatted citations as markdown string (empty if there are no sources)
     """
-    if not sources:
-        return ""
-    
-    citations = []
-    for i, source in enumerate(sources, 1):
-        book = source.get('book', 'Unknown')
-        page = source.get('page')
-        citations.append(f"{i}. {format_citation(book, page)}")
-    
-    return "\n".join(citations)
+    return "\n".join(
+        f"{i}. {format_citation(source.book, source.page)}"
+        for i, source in enumerate(sources, 1)
+    )
 
 
 def validate_pdf(file_path: str) -> bool:
@@ -83,6 +78,23 @@ def validate_pdf(file_path: str) -> bool:
     return file_path.lower().endswith('.pdf')
 
 
+def list_pdf_files(directory) -> List[os.DirEntry]:
+    """
+    List PDF files in a directory with a single scandir pass
+    
+    Args:
+        directory: Directory to scan
+        
+    Returns:
+        DirEntry objects for PDF files (stat() results are cached on each entry)
+    """
+    with os.scandir(directory) as entries:
+        return [
+            entry for entry in entries
+            if validate_pdf(entry.name) and entry.is_file()
+        ]
+
+
 def get_timestamp() -> str:
     """
     Get current timestamp in readable format
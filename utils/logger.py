@@ -3,10 +3,13 @@ Centralized Logging Utility Module
 Provides structured logging with console and file output, log rotation, and performance tracking
 """
 
+import atexit
 import logging
+import queue
 import sys
+import threading
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
 from functools import wraps
 from typing import Optional, Any, Callable
@@ -26,19 +29,86 @@ class ColoredFormatter(logging.Formatter):
         'RESET': '\033[0m'        # Reset
     }
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Colored level names are built once rather than per record
+        reset = self.COLORS['RESET']
+        self._colored = {
+            level: f"{color}{level}{reset}"
+            for level, color in self.COLORS.items()
+            if level != 'RESET'
+        }
+    
     def format(self, record):
         # Add color to level name
         levelname = record.levelname
-        if levelname in self.COLORS:
-            record.levelname = f"{self.COLORS[levelname]}{levelname}{self.COLORS['RESET']}"
-        
-        # Format the message
-        formatted = super().format(record)
-        
-        # Reset levelname for other handlers
-        record.levelname = levelname
+        record.levelname = self._colored.get(levelname, levelname)
         
-        return formatted
+        try:
+            # Format the message
+            return super().format(record)
+        finally:
+            # Reset levelname for other handlers
+            record.levelname = levelname
+
+
+class _FileQueueHandler(QueueHandler):
+    """Queue records for the shared listener, tagged with the file handler that writes them"""
+    
+    def __init__(self, log_queue: queue.Queue, file_handler: logging.Handler):
+        super().__init__(log_queue)
+        self.file_handler = file_handler
+        self.setLevel(file_handler.level)
+    
+    def prepare(self, record):
+        # prepare() returns a copy, so the tag does not leak to other handlers
+        record = super().prepare(record)
+        record.file_handler = self.file_handler
+        return record
+
+
+class _FileHandlerDispatcher(logging.Handler):
+    """Listener-side handler that passes each record to its tagged file handler"""
+    
+    def emit(self, record):
+        record.file_handler.handle(record)
+
+
+# One queue and one listener thread write the log files of every logger
+_log_queue = queue.Queue(-1)
+_queue_listener = None
+_queue_listener_lock = threading.Lock()
+# Set in worker processes, where no listener thread is running
+_direct_file_output = False
+
+
+def _start_queue_listener() -> None:
+    """Start the shared file-writing listener thread on first use"""
+    global _queue_listener
+    with _queue_listener_lock:
+        if _queue_listener is None:
+            _queue_listener = QueueListener(_log_queue, _FileHandlerDispatcher())
+            _queue_listener.start()
+            atexit.register(_queue_listener.stop)
+
+
+def init_worker_logging() -> None:
+    """
+    Make this process write its log files directly
+    
+    Use as the initializer of process pools: a forked worker inherits the
+    queue handlers but not the listener thread that drains them, and a
+    worker's atexit hooks do not run, so queued records would be lost.
+    """
+    global _direct_file_output
+    _direct_file_output = True
+    for logger in list(logging.Logger.manager.loggerDict.values()):
+        if not isinstance(logger, logging.Logger):
+            continue
+        for handler in list(logger.handlers):
+            if isinstance(handler, _FileQueueHandler):
+                logger.removeHandler(handler)
+                logger.addHandler(handler.file_handler)
 
 
 class LogContext:
@@ -118,7 +188,7 @@ def setup_logger(
             log_dir = Path(__file__).parent.parent / "logs"
         log_dir.mkdir(exist_ok=True)
         
-        # Create rotating file handler
+        # Create rotating file handler (written from the queue listener thread)
         log_file = log_dir / f"{name.replace('.', '_')}.log"
         file_handler = RotatingFileHandler(
             log_file,
@@ -132,7 +202,14 @@ def setup_logger(
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        
+        if _direct_file_output:
+            logger.addHandler(file_handler)
+        else:
+            # Records are queued and written by the shared listener thread, so
+            # callers never wait on disk I/O; the listener drains the queue at exit
+            _start_queue_listener()
+            logger.addHandler(_FileQueueHandler(_log_queue, file_handler))
     
     return logger
 
@@ -177,12 +254,26 @@ def log_execution_time(func: Optional[Callable] = None, *, log_args: bool = Fals
             pass
     """
     def decorator(f: Callable) -> Callable:
+        # Loggers are singletons, so this is the same object setup_logger configures
+        logger = logging.getLogger(f.__module__)
+        func_name = f.__name__
+        
         @wraps(f)
         def wrapper(*args, **kwargs) -> Any:
-            logger = logging.getLogger(f.__module__)
+            if not logger.isEnabledFor(logging.DEBUG):
+                # Nothing to trace; only failures are still reported
+                start_time = time.time()
+                try:
+                    return f(*args, **kwargs)
+                except Exception as e:
+                    duration = time.time() - start_time
+                    logger.error(
+                        f"Failed: {func_name} | Duration: {duration:.3f}s | "
+                        f"Error: {type(e).__name__}: {str(e)}"
+                    )
+                    raise
             
             # Build log message
-            func_name = f.__name__
             msg_parts = [f"Executing: {func_name}"]
             
             if log_args and (args or kwargs):